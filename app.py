@@ -1,9 +1,14 @@
 from os import scandir
+from signal import SIGTERM
+from asyncio import run
+from asyncio import current_task
+from asyncio import get_running_loop
 from logging import debug
 from importlib import import_module
 
 from client.bot import bot
 from client.config import DISCORD_TOKEN
+from graph.storage import close_store
 
 MODULE_EXTENSION = ".py"
 
@@ -17,10 +22,21 @@ def load_modules(package: str) -> None:
             import_module(load_target)
 
 
+async def start() -> None:
+    # Stopping the container should also close the SPARQL store cleanly
+    get_running_loop().add_signal_handler(SIGTERM, current_task().cancel)
+    try:
+        await bot.start(token=DISCORD_TOKEN)
+    finally:
+        if not bot.is_closed():
+            await bot.close()
+        await close_store()
+
+
 def main() -> None:
     for package in ("events", "commands"):
         load_modules(package)
-    bot.run(token=DISCORD_TOKEN)
+    run(start())
 
 
 if __name__ == "__main__":
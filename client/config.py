@@ -36,6 +36,9 @@ assert SPARQL_ENDPOINT_QUERY, "SPARQL query endpoint not provided"
 SPARQL_ENDPOINT_UPDATE = getenv("SPARQL_ENDPOINT_UPDATE", SPARQL_ENDPOINT_QUERY)
 assert SPARQL_ENDPOINT_UPDATE, "SPARQL update endpoint not provided"
 
+# Optional SPARQL 1.1 Graph Store Protocol endpoint for bulk loading triples
+SPARQL_ENDPOINT_GRAPH = getenv("SPARQL_ENDPOINT_GRAPH")
+
 # SPARQL endpoint authentication
 _SPARQL_USERNAME = getenv("SPARQL_USERNAME")
 _SPARQL_PASSWORD = getenv("SPARQL_PASSWORD")
@@ -44,3 +47,33 @@ SPARQL_AUTH = (
     if _SPARQL_USERNAME and _SPARQL_PASSWORD
     else None
 )
+
+# Number of newest stored messages re-verified on incremental channel updates
+CHANNEL_VERIFY_LIMIT = max(int(getenv("CHANNEL_VERIFY_LIMIT", "100")), 1)
+
+# Number of messages held in memory and patched at once when crawling a channel
+CHANNEL_WINDOW = max(int(getenv("CHANNEL_WINDOW", "500")), 1)
+
+# Number of channels and guilds crawled concurrently during synchronisation
+CRAWLER_CHANNELS = int(getenv("CRAWLER_CHANNELS", "4"))
+CRAWLER_GUILDS = int(getenv("CRAWLER_GUILDS", "2"))
+
+# Number of events queued per guild before further events wait for a free slot
+EVENT_QUEUE_SIZE = max(int(getenv("EVENT_QUEUE_SIZE", "1000")), 1)
+
+# Seconds without further updates to the same entity before handling the latest
+UPDATE_QUIET_PERIOD = float(getenv("UPDATE_QUIET_PERIOD", "2"))
+
+# Number of modified triples beyond which update notifications omit the patch
+PATCH_DIFF_LIMIT = int(getenv("PATCH_DIFF_LIMIT", "10000"))
+
+# SPARQL endpoint connection pool size and request timeout in seconds
+SPARQL_CONNECTIONS = int(getenv("SPARQL_CONNECTIONS", "8"))
+SPARQL_TIMEOUT = float(getenv("SPARQL_TIMEOUT", "300"))
+
+# Write-behind batching of SPARQL updates, as buffered triples and seconds
+SPARQL_BATCH_SIZE = int(getenv("SPARQL_BATCH_SIZE", "10000"))
+SPARQL_BATCH_DELAY = float(getenv("SPARQL_BATCH_DELAY", "2"))
+
+# Seconds that new messages are buffered before writing, as one batch per guild
+MESSAGE_BATCH_DELAY = float(getenv("MESSAGE_BATCH_DELAY", "0.25"))
@@ -33,16 +33,14 @@ async def command_cbd(context: ApplicationContext, uri: str) -> None:
     guild_graph = await graph(guild_uri)
 
     uri = await parse_discord_uri(uri)
-    uri_cbd = guild_graph.cbd(uri)
-
-    guild_graph.close()
+    uri_cbd = await guild_graph.cbd(uri)
 
     if not uri_cbd:
         user_match = USER_REGEX.fullmatch(uri)
         if user_match:
             warning(f"Retrieving user from Discord API <{uri}>")
             discord_user = await bot.fetch_user(int(user_match.group("id")))
-            uri_cbd = cbd(discord_user)
+            uri_cbd = cbd(discord_user).graph()
 
     if uri_cbd:
         content, file = await graph_to_yaml(uri_cbd, "cbd.yaml")
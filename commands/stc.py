@@ -121,7 +121,7 @@ async def command_stc(
         }}
     """
 
-    result = guild_graph.query(query_string)
+    result = await guild_graph.query(query_string)
 
     token_counts: Dict[str, int] = {}
     var_content = Variable("content")
@@ -12,6 +12,8 @@ from discord.commands.context import ApplicationContext
 
 from client.bot import bot
 from graph.convert import uri
+from updates.guild import suspend_guilds
+from updates.guild import resume_guilds
 from updates.guild import synchronise_guilds
 
 
@@ -29,6 +31,18 @@ async def on_ready() -> None:
     info("Initialisation flow complete")
 
 
+@bot.event
+async def on_disconnect() -> None:
+    # The events missed until the next session are caught up on in on_ready
+    await suspend_guilds()
+
+
+@bot.event
+async def on_resumed() -> None:
+    # Resuming the session replays the missed events, so no catch-up is needed
+    await resume_guilds()
+
+
 @bot.event
 async def on_error(event: str, *args, **kwargs) -> None:
     error(f"Event handling failed: {event}")
@@ -5,8 +5,12 @@ from discord.guild import Guild
 from client.bot import bot
 from graph.convert import uri
 from events.utilities import ignore_unchanged_on_update
+from events.utilities import coalesce_updates
+from events.utilities import supersede_coalesced_updates
+from events.utilities import ordered_per_guild
 from updates.guild import update_guild
 from updates.guild import delete_guild
+from updates.guild import synchronise_guild
 from updates.utilities import send_notification
 
 
@@ -14,18 +18,21 @@ from updates.utilities import send_notification
 async def on_guild_join(guild: Guild) -> None:
     guild_uri = uri(guild)
     warning(f"Joined guild <{guild_uri}>")
-    file = await update_guild(guild, validate_content=True)
-    await send_notification(guild, file)
+    await synchronise_guild(guild)
 
 
 @bot.event
 @ignore_unchanged_on_update
+@coalesce_updates
+@ordered_per_guild
 async def on_guild_update(before: Guild, after: Guild) -> None:
     file = await update_guild(after, validate_content=False)
     await send_notification(after, file)
 
 
 @bot.event
+@supersede_coalesced_updates
+@ordered_per_guild
 async def on_guild_remove(guild: Guild) -> None:
     guild_uri = uri(guild)
     warning(f"Left guild <{guild_uri}>")
@@ -8,6 +8,9 @@ from graph.convert import uri
 from graph.storage import graph
 from events.utilities import ignore_unchanged_on_update
 from events.utilities import find_guild
+from events.utilities import coalesce_updates
+from events.utilities import supersede_coalesced_updates
+from events.utilities import ordered_per_guild
 from updates.guild import refresh_channels
 from updates.shared import update_entity
 from updates.shared import delete_entity
@@ -15,16 +18,18 @@ from updates.utilities import send_notification
 
 
 @bot.event
+@ordered_per_guild
 async def on_member_join(member: Member) -> None:
     guild_uri = uri(member.guild)
     guild_graph = await graph(guild_uri)
     file = await update_entity(guild_graph, member)
-    guild_graph.commit()
-    guild_graph.close()
+    await guild_graph.commit()
     await send_notification(member.guild, file)
 
 
 @bot.event
+@supersede_coalesced_updates
+@ordered_per_guild
 async def on_raw_member_remove(payload: RawMemberRemoveEvent) -> None:
     if payload.user.id != bot.user.id:
         guild = find_guild(payload)
@@ -32,8 +37,7 @@ async def on_raw_member_remove(payload: RawMemberRemoveEvent) -> None:
         member_uri = uri(payload.user)
         guild_graph = await graph(guild_uri)
         file = await delete_entity(guild_graph, member_uri)
-        guild_graph.commit()
-        guild_graph.close()
+        await guild_graph.commit()
         await send_notification(guild, file)
     else:
         warning("Ignoring raw member remove event for bot user")
@@ -41,13 +45,18 @@ async def on_raw_member_remove(payload: RawMemberRemoveEvent) -> None:
 
 @bot.event
 @ignore_unchanged_on_update
+@coalesce_updates
 async def on_member_update(before: Member, after: Member) -> None:
-    guild_uri = uri(after.guild)
-    guild_graph = await graph(guild_uri)
-    file = await update_entity(guild_graph, after)
-    guild_graph.commit()
-    guild_graph.close()
-    await send_notification(after.guild, file)
+    await update_member(after)
     if after.id == bot.user.id:
         file = await refresh_channels(after.guild)
         await send_notification(after.guild, file)
+
+
+@ordered_per_guild
+async def update_member(member: Member) -> None:
+    guild_uri = uri(member.guild)
+    guild_graph = await graph(guild_uri)
+    file = await update_entity(guild_graph, member)
+    await guild_graph.commit()
+    await send_notification(member.guild, file)
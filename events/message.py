@@ -1,14 +1,20 @@
+from discord.abc import GuildChannel
+from discord.threads import Thread
 from discord.message import Message
 from discord.raw_models import RawMessageDeleteEvent
 from discord.raw_models import RawMessageUpdateEvent
 from discord.raw_models import RawBulkMessageDeleteEvent
 
 from client.bot import bot
+from client.config import MESSAGE_BATCH_DELAY
 from events.utilities import find_guild
 from events.utilities import ignore_public_updates_channel
+from events.utilities import ignore_unchanged_message_edit
+from events.utilities import ordered_per_guild
 from graph.convert import uri
 from graph.storage import graph
 from graph.utilities import create_message_uri
+from updates.message import create_message
 from updates.message import update_message
 from updates.message import delete_message
 from updates.message import bulk_delete_messages
@@ -17,32 +23,40 @@ from updates.utilities import send_notification
 
 @bot.event
 @ignore_public_updates_channel
+@ordered_per_guild
 async def on_message(message: Message) -> None:
     guild_uri = uri(message.guild)
     guild_graph = await graph(guild_uri)
-    file = await update_message(guild_graph, message)
-    guild_graph.commit()
-    guild_graph.close()
+    file = await create_message(guild_graph, message)
+    await guild_graph.commit(delay=MESSAGE_BATCH_DELAY)
     # Logging every new message would get really spammy really fast
     # await send_notification(message.guild, file)
 
 
 @bot.event
 @ignore_public_updates_channel
+@ignore_unchanged_message_edit
+@ordered_per_guild
 async def on_raw_message_edit(payload: RawMessageUpdateEvent) -> None:
     guild = find_guild(payload)
-    channel = bot.get_channel(payload.channel_id)
-    message = await channel.fetch_message(payload.message_id)
+    message = payload.new_message
+    # Partial payloads or unresolved channels need the full message from the API
+    if "author" not in payload.data or not isinstance(
+        message.channel,
+        (GuildChannel, Thread),
+    ):
+        channel = bot.get_channel(payload.channel_id)
+        message = await channel.fetch_message(payload.message_id)
     guild_uri = uri(guild)
     guild_graph = await graph(guild_uri)
     file = await update_message(guild_graph, message)
-    guild_graph.commit()
-    guild_graph.close()
+    await guild_graph.commit()
     await send_notification(guild, file)
 
 
 @bot.event
 @ignore_public_updates_channel
+@ordered_per_guild
 async def on_raw_message_delete(payload: RawMessageDeleteEvent) -> None:
     guild = find_guild(payload)
     guild_uri = uri(guild)
@@ -53,13 +67,13 @@ async def on_raw_message_delete(payload: RawMessageDeleteEvent) -> None:
         payload.message_id,
     )
     file = await delete_message(guild_graph, message_uri)
-    guild_graph.commit()
-    guild_graph.close()
+    await guild_graph.commit()
     await send_notification(guild, file)
 
 
 @bot.event
 @ignore_public_updates_channel
+@ordered_per_guild
 async def on_raw_bulk_message_delete(payload: RawBulkMessageDeleteEvent) -> None:
     guild = find_guild(payload)
     guild_uri = uri(guild)
@@ -69,6 +83,5 @@ async def on_raw_bulk_message_delete(payload: RawBulkMessageDeleteEvent) -> None
         for msg_id in payload.message_ids
     )
     file = await bulk_delete_messages(guild_graph, message_uris)
-    guild_graph.commit()
-    guild_graph.close()
+    await guild_graph.commit()
     await send_notification(guild, file)
@@ -4,6 +4,9 @@ from client.bot import bot
 from graph.convert import uri
 from graph.storage import graph
 from events.utilities import ignore_unchanged_on_update
+from events.utilities import coalesce_updates
+from events.utilities import supersede_coalesced_updates
+from events.utilities import ordered_per_guild
 from updates.guild import refresh_channels
 from updates.shared import update_entity
 from updates.shared import delete_entity
@@ -11,35 +14,41 @@ from updates.utilities import send_notification
 
 
 @bot.event
+@ordered_per_guild
 async def on_guild_role_create(role: Role) -> None:
     guild_uri = uri(role.guild)
     guild_graph = await graph(guild_uri)
     file = await update_entity(guild_graph, role)
-    guild_graph.commit()
-    guild_graph.close()
+    await guild_graph.commit()
     await send_notification(role.guild, file)
 
 
 @bot.event
+@supersede_coalesced_updates
+@ordered_per_guild
 async def on_guild_role_delete(role: Role) -> None:
     guild_uri = uri(role.guild)
     guild_graph = await graph(guild_uri)
-    file = await delete_entity(guild_graph, role)
-    guild_graph.commit()
-    guild_graph.close()
+    file = await delete_entity(guild_graph, uri(role))
+    await guild_graph.commit()
     await send_notification(role.guild, file)
 
 
 @bot.event
 @ignore_unchanged_on_update
+@coalesce_updates
 async def on_guild_role_update(before: Role, after: Role) -> None:
-    guild_uri = uri(after.guild)
-    guild_graph = await graph(guild_uri)
-    file = await update_entity(guild_graph, after)
-    guild_graph.commit()
-    guild_graph.close()
-    await send_notification(after.guild, file)
+    await update_role(after)
     bot_member = after.guild.get_member(bot.user.id)
     if bot_member and after in bot_member.roles:
         file = await refresh_channels(after.guild)
         await send_notification(after.guild, file)
+
+
+@ordered_per_guild
+async def update_role(role: Role) -> None:
+    guild_uri = uri(role.guild)
+    guild_graph = await graph(guild_uri)
+    file = await update_entity(guild_graph, role)
+    await guild_graph.commit()
+    await send_notification(role.guild, file)
@@ -7,12 +7,16 @@ from client.bot import bot
 from graph.convert import uri
 from graph.storage import graph
 from events.utilities import ignore_unchanged_on_update
+from events.utilities import coalesce_updates
+from events.utilities import ordered_per_guild
 from updates.sticker import update_guild_stickers
 from updates.utilities import send_notification
 
 
 @bot.event
 @ignore_unchanged_on_update
+@coalesce_updates
+@ordered_per_guild
 async def on_guild_stickers_update(
     guild: Guild,
     before: Iterable[GuildSticker],
@@ -21,6 +25,5 @@ async def on_guild_stickers_update(
     guild_uri = uri(guild)
     guild_graph = await graph(guild_uri)
     file = await update_guild_stickers(guild_graph, after)
-    guild_graph.commit()
-    guild_graph.close()
+    await guild_graph.commit()
     await send_notification(guild, file)
@@ -8,8 +8,12 @@ from graph.storage import graph
 from graph.utilities import create_thread_uri
 from events.utilities import find_guild
 from events.utilities import ignore_public_updates_channel
+from events.utilities import coalesce_updates
+from events.utilities import supersede_coalesced_updates
+from events.utilities import ordered_per_guild
 from updates.channel import update_channel
 from updates.channel import delete_channel
+from updates.channel import update_channel_metadata
 from updates.utilities import send_notification
 
 
@@ -19,32 +23,33 @@ async def on_thread_create(thread: Thread) -> None:
     guild_uri = uri(thread.guild)
     guild_graph = await graph(guild_uri)
     file = await update_channel(guild_graph, thread)
-    guild_graph.commit()
-    guild_graph.close()
+    await guild_graph.commit()
     await send_notification(thread.guild, file)
 
 
 @bot.event
 @ignore_public_updates_channel
+@coalesce_updates
+@ordered_per_guild
 async def on_raw_thread_update(payload: RawThreadUpdateEvent) -> None:
     guild = find_guild(payload)
     guild_uri = uri(guild)
     guild_graph = await graph(guild_uri)
-    thread = bot.get_channel(payload.thread_id)
-    file = await update_channel(guild_graph, thread)
-    guild_graph.commit()
-    guild_graph.close()
+    # Thread updates never change the visible history, only the thread attributes
+    file = await update_channel_metadata(guild_graph, payload.thread)
+    await guild_graph.commit()
     await send_notification(guild, file)
 
 
 @bot.event
 @ignore_public_updates_channel
+@supersede_coalesced_updates
+@ordered_per_guild
 async def on_raw_thread_delete(payload: RawThreadDeleteEvent) -> None:
     guild = find_guild(payload)
     guild_uri = uri(guild)
     guild_graph = await graph(guild_uri)
     thread_uri = await create_thread_uri(payload.guild_id, payload.thread_id)
     file = await delete_channel(guild_graph, thread_uri)
-    guild_graph.commit()
-    guild_graph.close()
+    await guild_graph.commit()
     await send_notification(guild, file)
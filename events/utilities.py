@@ -1,10 +1,14 @@
+from time import monotonic
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Tuple
 from typing import Optional
 from typing import Coroutine
+from asyncio import sleep
 from logging import debug
 from functools import wraps
-
-from rdflib.compare import IsomorphicGraph
-from rdflib.compare import to_isomorphic
+from functools import partial
 
 from discord.abc import GuildChannel
 from discord.guild import Guild
@@ -17,9 +21,14 @@ from discord.raw_models import RawThreadDeleteEvent
 from discord.raw_models import RawThreadUpdateEvent
 from discord.raw_models import RawMemberRemoveEvent
 
+from rdflib.term import URIRef
+
 from client.bot import bot
+from client.config import UPDATE_QUIET_PERIOD
 from graph.convert import uri
-from graph.convert import cbd
+from graph.convert import attributes
+from graph.utilities import create_thread_uri
+from updates.queue import submit
 
 
 def ignore_public_updates_channel(func: Coroutine) -> Coroutine:
@@ -39,7 +48,7 @@ def ignore_public_updates_channel(func: Coroutine) -> Coroutine:
         elif isinstance(args[0], Message):
             channel_id = args[0].channel.id
             guild = args[0].guild
-        elif isinstance(args[0], RawThreadDeleteEvent):
+        elif isinstance(args[0], (RawThreadDeleteEvent, RawThreadUpdateEvent)):
             channel_id = args[0].parent_id
             guild = bot.get_guild(args[0].guild_id)
         elif isinstance(
@@ -48,7 +57,6 @@ def ignore_public_updates_channel(func: Coroutine) -> Coroutine:
                 RawMessageDeleteEvent,
                 RawMessageUpdateEvent,
                 RawBulkMessageDeleteEvent,
-                RawThreadUpdateEvent,
             ),
         ):
             channel_id = args[0].channel_id
@@ -72,27 +80,148 @@ def ignore_unchanged_on_update(func: Coroutine) -> Coroutine:
 
     @wraps(func)
     async def ignore_unchanged_on_update_wrapper(*args, **kwargs) -> None:
-        cbd_first = None
-        cbd_second = None
+        unchanged = False
         if len(args) > 1 and type(args[0]) == type(args[1]):
-            cbd_first = to_isomorphic(cbd(args[0]))
-            cbd_second = to_isomorphic(cbd(args[1]))
+            unchanged = attributes(args[0]) == attributes(args[1])
         elif len(args) > 2 and type(args[1]) == type(args[2]):
-            cbd_first = IsomorphicGraph()
-            cbd_second = IsomorphicGraph()
-            for value in args[1]:
-                cbd_first += cbd(value)
-            for value in args[2]:
-                cbd_second += cbd(value)
-        unchanged = cbd_first == cbd_second if cbd_first is not None else False
+            before = {value.id: attributes(value) for value in args[1]}
+            after = {value.id: attributes(value) for value in args[2]}
+            unchanged = before == after
         if unchanged:
-            debug(f"Ignoring {func.__name__} for unchanged <{cbd_first.identifier}>")
+            debug(f"Ignoring {func.__name__} for unchanged attributes")
         else:
             return await func(*args, **kwargs)
 
     return ignore_unchanged_on_update_wrapper
 
 
+def ignore_unchanged_message_edit(func: Coroutine) -> Coroutine:
+    """
+    Wrapper to ignore message edits that do not modify the stored message, like
+    embeds being unfurled or the message being pinned, which only change attributes
+    that are not stored. Edits to content or attachments always set the edit time,
+    so uncached messages without an edit time are not edited either.
+    """
+
+    @wraps(func)
+    async def ignore_unchanged_message_edit_wrapper(
+        payload: RawMessageUpdateEvent,
+    ) -> None:
+        before = payload.cached_message
+        if before:
+            unchanged = attributes(before) == attributes(payload.new_message)
+        else:
+            unchanged = not payload.data.get("edited_timestamp")
+        if unchanged:
+            debug(f"Ignoring {func.__name__} for unchanged attributes")
+        else:
+            return await func(payload)
+
+    return ignore_unchanged_message_edit_wrapper
+
+
+def ordered_per_guild(func: Coroutine) -> Coroutine:
+    """
+    Wrapper to handle the events of each guild one at a time in the order they
+    arrived, so that concurrent events do not race on the same guild graph.
+    """
+
+    @wraps(func)
+    async def ordered_per_guild_wrapper(*args, **kwargs) -> None:
+        guild_id = find_guild_id(*args)
+        if guild_id:
+            return await submit(guild_id, partial(func, *args, **kwargs))
+        else:
+            return await func(*args, **kwargs)
+
+    return ordered_per_guild_wrapper
+
+
+# Latest arguments and deadline of the coalesced updates, per handler and subject
+_coalesced: Dict[Tuple[str, Optional[int], URIRef], List[Any]] = {}
+
+
+def coalesce_updates(func: Coroutine) -> Coroutine:
+    """
+    Wrapper to handle a burst of update events for the same subject once, after no
+    further updates have arrived for the quiet period. The handler receives the
+    latest state, together with the state from before the first update.
+    """
+
+    @wraps(func)
+    async def coalesce_updates_wrapper(*args, **kwargs) -> None:
+        # Members share their user URI across guilds, so the guild is part of the key
+        key = (func.__name__, find_guild_id(*args), await find_subject(*args))
+        entry = _coalesced.get(key)
+        if entry:
+            earlier_args = entry[0]
+            if len(args) > 1 and type(args[-2]) is type(args[-1]):
+                args = (*args[:-2], earlier_args[-2], args[-1])
+            entry[:] = [args, kwargs, monotonic() + UPDATE_QUIET_PERIOD]
+            debug(f"Coalescing {func.__name__} for <{key[2]}>")
+            return
+        entry = [args, kwargs, monotonic() + UPDATE_QUIET_PERIOD]
+        _coalesced[key] = entry
+        try:
+            while _coalesced.get(key) is entry and entry[2] > monotonic():
+                await sleep(entry[2] - monotonic())
+        finally:
+            superseded = _coalesced.get(key) is not entry
+            if not superseded:
+                del _coalesced[key]
+        if superseded:
+            debug(f"Dropping {func.__name__} for removed <{key[2]}>")
+        else:
+            args, kwargs, _ = entry
+            return await func(*args, **kwargs)
+
+    return coalesce_updates_wrapper
+
+
+def supersede_coalesced_updates(func: Coroutine) -> Coroutine:
+    """
+    Wrapper to drop the pending coalesced updates of a subject being removed from a
+    guild, or of everything in the guild when the guild itself is removed.
+    """
+
+    @wraps(func)
+    async def supersede_coalesced_updates_wrapper(*args, **kwargs) -> None:
+        guild_id = find_guild_id(*args)
+        subject = await find_subject(*args)
+        guild_removed = isinstance(args[0], Guild)
+        for key in [
+            key
+            for key in _coalesced
+            if key[1] == guild_id and (guild_removed or key[2] == subject)
+        ]:
+            del _coalesced[key]
+        return await func(*args, **kwargs)
+
+    return supersede_coalesced_updates_wrapper
+
+
+async def find_subject(*args) -> URIRef:
+    """Finds the URI of the entity an event is about from the event arguments."""
+    if isinstance(args[0], (RawThreadDeleteEvent, RawThreadUpdateEvent)):
+        return await create_thread_uri(args[0].guild_id, args[0].thread_id)
+    elif isinstance(args[0], RawMemberRemoveEvent):
+        return uri(args[0].user)
+    else:
+        return uri(args[0])
+
+
+def find_guild_id(*args) -> Optional[int]:
+    """Finds the ID of the guild an event belongs to from the event arguments."""
+    for value in args:
+        if isinstance(value, Guild):
+            return value.id
+        elif getattr(value, "guild_id", None):
+            return value.guild_id
+        elif getattr(value, "guild", None):
+            return value.guild.id
+    return None
+
+
 def find_guild(
     payload: (
         RawMessageDeleteEvent
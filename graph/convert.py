@@ -1,3 +1,11 @@
+from typing import List
+from typing import Tuple
+from typing import Iterator
+from hashlib import blake2b
+from operator import attrgetter
+from functools import cache
+from functools import lru_cache
+from functools import singledispatch
 from datetime import UTC
 from datetime import datetime
 from urllib.parse import urlparse
@@ -7,6 +15,7 @@ from discord.abc import GuildChannel
 from discord.role import Role
 from discord.guild import Guild
 from discord.emoji import Emoji
+from discord.user import BaseUser
 from discord.member import Member
 from discord.threads import Thread
 from discord.channel import VocalGuildChannel
@@ -18,15 +27,36 @@ from discord.message import Message
 from discord.stage_instance import StageInstance
 from discord.scheduled_events import ScheduledEvent
 
+from rdflib.term import Node
 from rdflib.term import URIRef
 from rdflib.term import Literal
-from rdflib.compare import IsomorphicGraph
+from rdflib.graph import Graph
 from rdflib.namespace import RDF
 from rdflib.namespace import XSD
 
 from graph.vocabulary import DISCORD
 from graph.vocabulary import DISCORD_URI
 
+Triple = Tuple[Node, Node, Node]
+
+# Number of entity URIs kept for reuse, which covers the working set of a guild
+URI_CACHE_SIZE = 65536
+
+
+@lru_cache(maxsize=URI_CACHE_SIZE)
+def interned_uri(value: str) -> URIRef:
+    """
+    Returns a shared URI term for the URIs of long-lived entities, which appear in
+    many descriptions, so that repeated terms are not allocated and hashed again.
+    """
+    return URIRef(value)
+
+
+@cache
+def interned_literal(value: str) -> Literal:
+    """Returns a shared plain literal for values from small fixed domains."""
+    return Literal(value)
+
 
 def uri(value: object) -> URIRef:
     """Resolves the URI of an object, if possible."""
@@ -37,17 +67,19 @@ def uri(value: object) -> URIRef:
         parsed_url = urlparse(value.url)
         return URIRef(parsed_url.path, parsed_url.geturl())
     elif isinstance(value, User):
-        return URIRef(f"{DISCORD_URI}/users/{value.id}")
+        return interned_uri(f"{DISCORD_URI}/users/{value.id}")
     elif isinstance(value, Guild):
-        return URIRef(f"{DISCORD_URI}/guilds/{value.id}")
+        return interned_uri(f"{DISCORD_URI}/guilds/{value.id}")
     elif isinstance(value, (Role, GuildSticker, Emoji)):
-        return URIRef(f"{DISCORD_URI}/guilds/{value.guild.id}/{value.id}")
+        return interned_uri(f"{DISCORD_URI}/guilds/{value.guild.id}/{value.id}")
     elif isinstance(value, StageInstance):
         return URIRef(
             f"{DISCORD_URI}/channels/{value.guild}/{value.channel_id}/{value.id}"
         )
-    elif isinstance(value, (Message, GuildChannel, Thread)):
+    elif isinstance(value, Message):
         return URIRef(value.jump_url)
+    elif isinstance(value, (GuildChannel, Thread)):
+        return interned_uri(value.jump_url)
     raise TypeError(f"Unable to determine URI for type {type(value)}")
 
 
@@ -67,6 +99,7 @@ def xsd_integer(value: int) -> Literal:
     )
 
 
+@cache
 def xsd_boolean(value: bool) -> Literal:
     """Convert a Python boolean value into string literal with datatype xsd:boolean"""
     return Literal(
@@ -75,6 +108,21 @@ def xsd_boolean(value: bool) -> Literal:
     )
 
 
+def fingerprint(graph: Graph, subject: Node) -> Literal:
+    """
+    Hashes the description of a subject in a graph, for detecting changes without
+    comparing full descriptions. The edit time is left out, because it is assigned
+    when the stored description is modified.
+    """
+    statements = sorted(
+        f"{predicate.n3()} {object.n3()}"
+        for predicate, object in graph.predicate_objects(subject)
+        if predicate not in (DISCORD.editedAt, DISCORD.fingerprint)
+    )
+    digest = blake2b("\n".join(statements).encode(), digest_size=16)
+    return Literal(digest.hexdigest())
+
+
 def snowflake_datetime(id: int) -> datetime:
     """
     Utility function to convert a Snowflake ID into a timezone-aware datetime.
@@ -105,221 +153,315 @@ def hex_rgb(red: int, green: int, blue: int) -> Literal:
     return Literal(f"#{red:02x}{green:02x}{blue:02x}")
 
 
-def cbd(value: object) -> IsomorphicGraph:
+class Description:
+    """
+    Concise Bounded Description of one subject as a plain list of triples, without
+    an rdflib store. It can be added to graphs and patches or serialized directly,
+    and copied into a graph when the graph API is needed.
+    """
+
+    __slots__ = ("identifier", "triples")
+
+    def __init__(self, identifier: URIRef) -> None:
+        self.identifier = identifier
+        self.triples: List[Triple] = []
+
+    def __iter__(self) -> Iterator[Triple]:
+        return iter(self.triples)
+
+    def __len__(self) -> int:
+        return len(self.triples)
+
+    def __eq__(self, other: object) -> bool:
+        return (
+            isinstance(other, Description)
+            and self.identifier == other.identifier
+            and set(self.triples) == set(other.triples)
+        )
+
+    def add(self, predicate: URIRef, object: Node) -> None:
+        """Adds a statement about the described subject."""
+        self.triples.append((self.identifier, predicate, object))
+
+    def graph(self) -> Graph:
+        """Copies the description into a graph named after the subject."""
+        graph = Graph(identifier=self.identifier)
+        graph += self.triples
+        return graph
+
+
+def cbd(value: object) -> Description:
     """Creates the Concise Bounded Description for a supported Python object."""
-    graph = IsomorphicGraph(identifier=uri(value))
-    graph.add((graph.identifier, RDF.type, DISCORD.Snowflake))
-    if isinstance(value, Guild):
-        for triple in (
-            (graph.identifier, RDF.type, DISCORD.Guild),
-            (graph.identifier, DISCORD.name, Literal(value.name)),
-            (graph.identifier, DISCORD.icon, uri(value.icon.url)),
-            (graph.identifier, DISCORD.createdAt, xsd_datetime(value.created_at)),
-            (graph.identifier, DISCORD.editedAt, xsd_datetime(value.created_at)),
-        ):
-            graph.add(triple)
-    elif isinstance(value, Role):
-        for triple in (
-            (graph.identifier, RDF.type, DISCORD.Role),
-            (graph.identifier, DISCORD.name, Literal(value.name)),
-            (graph.identifier, DISCORD.createdAt, xsd_datetime(value.created_at)),
-            (graph.identifier, DISCORD.editedAt, xsd_datetime(value.created_at)),
-            (
-                graph.identifier,
-                DISCORD.colour,
-                hex_rgb(value.colour.r, value.colour.g, value.colour.b),
-            ),
-            *(
-                (graph.identifier, DISCORD.permission, Literal(name))
-                for name, granted in value.permissions
-                if granted
-            ),
-        ):
-            graph.add(triple)
-    elif isinstance(value, Emoji):
-        for triple in (
-            (graph.identifier, RDF.type, DISCORD.Emoji),
-            (graph.identifier, DISCORD.name, Literal(value.name)),
-            (graph.identifier, DISCORD.createdAt, xsd_datetime(value.created_at)),
-            (graph.identifier, DISCORD.editedAt, xsd_datetime(value.created_at)),
-            (graph.identifier, DISCORD.managed, xsd_boolean(value.managed)),
-            (graph.identifier, DISCORD.animated, xsd_boolean(value.animated)),
-            *((graph.identifier, DISCORD.role, uri(role)) for role in value.roles),
-        ):
-            graph.add(triple)
-    elif isinstance(value, GuildSticker):
-        for triple in (
-            (graph.identifier, RDF.type, DISCORD.GuildSticker),
-            (graph.identifier, DISCORD.name, Literal(value.name)),
-            (graph.identifier, DISCORD.emoji, Literal(value.emoji)),
-            (graph.identifier, DISCORD.createdAt, xsd_datetime(value.created_at)),
-            (graph.identifier, DISCORD.editedAt, xsd_datetime(value.created_at)),
-            (graph.identifier, DISCORD.description, Literal(value.description)),
-            (
-                graph.identifier,
-                DISCORD.contentType,
-                Literal(f"image/{value.format.name}"),
-            ),
-        ):
-            graph.add(triple)
-    elif isinstance(value, User):
-        for triple in (
-            (graph.identifier, RDF.type, DISCORD.User),
-            (graph.identifier, DISCORD.name, Literal(value.name)),
-            (graph.identifier, DISCORD.displayName, Literal(value.display_name)),
-            (graph.identifier, DISCORD.bot, xsd_boolean(value.bot)),
-        ):
-            graph.add(triple)
-        if value.avatar:
-            graph.add((graph.identifier, DISCORD.avatar, uri(value.avatar.url)))
-        if value.global_name:
-            graph.add(
-                (
-                    graph.identifier,
-                    DISCORD.globalName,
-                    Literal(value.global_name),
-                )
-            )
-        if isinstance(value, Member):
-            for triple in (
-                (
-                    graph.identifier,
-                    DISCORD.displayAvatar,
-                    uri(value.display_avatar.url),
-                ),
-                (graph.identifier, DISCORD.createdAt, xsd_datetime(value.created_at)),
-                (graph.identifier, DISCORD.editedAt, xsd_datetime(value.created_at)),
-                (graph.identifier, DISCORD.system, xsd_boolean(value.system)),
-                *((graph.identifier, DISCORD.role, uri(role)) for role in value.roles),
-            ):
-                graph.add(triple)
-    elif isinstance(value, Attachment):
-        creation_date = xsd_datetime(snowflake_datetime(value.id))
-        for triple in (
-            (graph.identifier, RDF.type, DISCORD.Attachment),
-            (graph.identifier, DISCORD.name, Literal(value.filename)),
-            (graph.identifier, DISCORD.sizeBytes, xsd_integer(value.size)),
-            (graph.identifier, DISCORD.createdAt, creation_date),
-            (graph.identifier, DISCORD.editedAt, creation_date),
-        ):
-            graph.add(triple)
-        if value.description:
-            graph.add(
-                (graph.identifier, DISCORD.description, Literal(value.description))
-            )
-        if value.content_type:
-            graph.add(
-                (graph.identifier, DISCORD.contentType, Literal(value.content_type))
-            )
-        if value.height:
-            graph.add(
-                (graph.identifier, DISCORD.heightPixels, xsd_integer(value.height))
-            )
-        if value.width:
-            graph.add((graph.identifier, DISCORD.widthPixels, xsd_integer(value.width)))
-    elif isinstance(value, Message):
-        for triple in (
-            (graph.identifier, RDF.type, DISCORD.Message),
-            (graph.identifier, DISCORD.content, Literal(value.clean_content)),
-            (graph.identifier, DISCORD.author, uri(value.author)),
-            (graph.identifier, DISCORD.createdAt, xsd_datetime(value.created_at)),
-            (
-                graph.identifier,
-                DISCORD.editedAt,
-                xsd_datetime(value.edited_at or value.created_at),
-            ),
-            (graph.identifier, DISCORD.channel, uri(value.channel)),
-            *(
-                (graph.identifier, DISCORD.attachment, uri(attachment))
-                for attachment in value.attachments
-            ),
-        ):
-            graph.add(triple)
-    elif isinstance(value, Thread):
-        for triple in (
-            (graph.identifier, RDF.type, DISCORD.Thread),
-            (graph.identifier, DISCORD.name, Literal(value.name)),
-            (graph.identifier, DISCORD.createdAt, xsd_datetime(value.created_at)),
-            (graph.identifier, DISCORD.editedAt, xsd_datetime(value.created_at)),
-            (graph.identifier, DISCORD.archived, xsd_boolean(value.archived)),
-        ):
-            graph.add(triple)
-        if value.archived:
-            graph.add(
-                (
-                    graph.identifier,
-                    DISCORD.archivedAt,
-                    xsd_datetime(value.archive_timestamp),
-                )
-            )
-        if value.parent:
-            graph.add((graph.identifier, DISCORD.parent, uri(value.parent)))
-    elif isinstance(value, GuildChannel):
-        for triple in (
-            (graph.identifier, RDF.type, DISCORD.Channel),
-            (graph.identifier, DISCORD.name, Literal(value.name)),
-            (graph.identifier, DISCORD.createdAt, xsd_datetime(value.created_at)),
-            (graph.identifier, DISCORD.editedAt, xsd_datetime(value.created_at)),
-            (graph.identifier, DISCORD.channelType, Literal(value.type.name)),
-        ):
-            graph.add(triple)
-        if value.category:
-            graph.add((graph.identifier, DISCORD.category, uri(value.category)))
-            graph.add(
-                (
-                    graph.identifier,
-                    DISCORD.permissionsSynced,
-                    xsd_boolean(value.permissions_synced),
-                )
-            )
-        if isinstance(value, (TextChannel, VocalGuildChannel, ForumChannel)):
-            graph.add((graph.identifier, DISCORD.nsfw, xsd_boolean(value.nsfw)))
-        if isinstance(value, VocalGuildChannel):
-            for triple in (
-                (graph.identifier, DISCORD.userLimit, xsd_integer(value.user_limit)),
-                (graph.identifier, DISCORD.bitRate, xsd_integer(value.bitrate)),
-                (
-                    graph.identifier,
-                    DISCORD.videoQualityMode,
-                    Literal(value.video_quality_mode.name),
-                ),
-            ):
-                graph.add(triple)
-            if value.rtc_region:
-                graph.add(
-                    (graph.identifier, DISCORD.rtcRegion, Literal(value.rtc_region))
-                )
-        elif isinstance(value, TextChannel) and value.topic:
-            graph.add((graph.identifier, DISCORD.description, Literal(value.topic)))
-    elif isinstance(value, ScheduledEvent):
-        creation_date = xsd_datetime(value.created_at)
-        for triple in (
-            (graph.identifier, RDF.type, DISCORD.ScheduledEvent),
-            (graph.identifier, DISCORD.name, Literal(value.name)),
-            (graph.identifier, DISCORD.createdAt, creation_date),
-            (graph.identifier, DISCORD.editedAt, creation_date),
-            (graph.identifier, DISCORD.status, Literal(value.status.value)),
-            (graph.identifier, DISCORD.startTime, xsd_datetime(value.start_time)),
-            (graph.identifier, DISCORD.locationType, Literal(value.location.type.name)),
-        ):
-            graph.add(triple)
-        if value.description:
-            graph.add(
-                (graph.identifier, DISCORD.description, Literal(value.description))
-            )
-        if value.end_time:
-            graph.add((graph.identifier, DISCORD.endTime, xsd_datetime(value.end_time)))
-    elif isinstance(value, StageInstance):
-        for triple in (
-            (graph.identifier, RDF.type, DISCORD.StageInstance),
-            (graph.identifier, DISCORD.description, Literal(value.topic)),
-            (
-                graph.identifier,
-                DISCORD.discoverableDisabled,
-                xsd_boolean(value.discoverable_disabled),
-            ),
-            (graph.identifier, DISCORD.privacyLevel, Literal(value.privacy_level.name)),
-        ):
-            graph.add(triple)
-    assert len(graph) > 1, f"Unable to convert {value} into graph"
-    return graph
+    description = Description(uri(value))
+    description.add(RDF.type, DISCORD.Snowflake)
+    describe(value, description)
+    assert len(description) > 1, f"Unable to convert {value} into graph"
+    return description
+
+
+@singledispatch
+def describe(value: object, description: Description) -> None:
+    """Adds the statements about a Python object, based on its type."""
+
+
+@describe.register
+def describe_guild(value: Guild, description: Description) -> None:
+    description.add(RDF.type, DISCORD.Guild)
+    description.add(DISCORD.name, Literal(value.name))
+    description.add(DISCORD.icon, uri(value.icon.url))
+    description.add(DISCORD.createdAt, xsd_datetime(value.created_at))
+    description.add(DISCORD.editedAt, xsd_datetime(value.created_at))
+
+
+@describe.register
+def describe_role(value: Role, description: Description) -> None:
+    description.add(RDF.type, DISCORD.Role)
+    description.add(DISCORD.name, Literal(value.name))
+    description.add(DISCORD.createdAt, xsd_datetime(value.created_at))
+    description.add(DISCORD.editedAt, xsd_datetime(value.created_at))
+    description.add(
+        DISCORD.colour,
+        hex_rgb(value.colour.r, value.colour.g, value.colour.b),
+    )
+    for name, granted in value.permissions:
+        if granted:
+            description.add(DISCORD.permission, interned_literal(name))
+
+
+@describe.register
+def describe_emoji(value: Emoji, description: Description) -> None:
+    description.add(RDF.type, DISCORD.Emoji)
+    description.add(DISCORD.name, Literal(value.name))
+    description.add(DISCORD.createdAt, xsd_datetime(value.created_at))
+    description.add(DISCORD.editedAt, xsd_datetime(value.created_at))
+    description.add(DISCORD.managed, xsd_boolean(value.managed))
+    description.add(DISCORD.animated, xsd_boolean(value.animated))
+    for role in value.roles:
+        description.add(DISCORD.role, uri(role))
+
+
+@describe.register
+def describe_sticker(value: GuildSticker, description: Description) -> None:
+    description.add(RDF.type, DISCORD.GuildSticker)
+    description.add(DISCORD.name, Literal(value.name))
+    description.add(DISCORD.emoji, Literal(value.emoji))
+    description.add(DISCORD.createdAt, xsd_datetime(value.created_at))
+    description.add(DISCORD.editedAt, xsd_datetime(value.created_at))
+    description.add(DISCORD.description, Literal(value.description))
+    description.add(
+        DISCORD.contentType,
+        interned_literal(f"image/{value.format.name}"),
+    )
+
+
+@describe.register(BaseUser)
+@describe.register(Member)
+def describe_user(value: BaseUser | Member, description: Description) -> None:
+    description.add(RDF.type, DISCORD.User)
+    description.add(DISCORD.name, Literal(value.name))
+    description.add(DISCORD.displayName, Literal(value.display_name))
+    description.add(DISCORD.bot, xsd_boolean(value.bot))
+    if value.avatar:
+        description.add(DISCORD.avatar, uri(value.avatar.url))
+    if value.global_name:
+        description.add(DISCORD.globalName, Literal(value.global_name))
+    if isinstance(value, Member):
+        description.add(DISCORD.displayAvatar, uri(value.display_avatar.url))
+        description.add(DISCORD.createdAt, xsd_datetime(value.created_at))
+        description.add(DISCORD.editedAt, xsd_datetime(value.created_at))
+        description.add(DISCORD.system, xsd_boolean(value.system))
+        for role in value.roles:
+            description.add(DISCORD.role, uri(role))
+
+
+@describe.register
+def describe_attachment(value: Attachment, description: Description) -> None:
+    creation_date = xsd_datetime(snowflake_datetime(value.id))
+    description.add(RDF.type, DISCORD.Attachment)
+    description.add(DISCORD.name, Literal(value.filename))
+    description.add(DISCORD.sizeBytes, xsd_integer(value.size))
+    description.add(DISCORD.createdAt, creation_date)
+    description.add(DISCORD.editedAt, creation_date)
+    if value.description:
+        description.add(DISCORD.description, Literal(value.description))
+    if value.content_type:
+        description.add(DISCORD.contentType, Literal(value.content_type))
+    if value.height:
+        description.add(DISCORD.heightPixels, xsd_integer(value.height))
+    if value.width:
+        description.add(DISCORD.widthPixels, xsd_integer(value.width))
+
+
+@describe.register
+def describe_message(value: Message, description: Description) -> None:
+    description.add(RDF.type, DISCORD.Message)
+    description.add(DISCORD.content, Literal(value.clean_content))
+    description.add(DISCORD.author, uri(value.author))
+    description.add(DISCORD.createdAt, xsd_datetime(value.created_at))
+    description.add(
+        DISCORD.editedAt,
+        xsd_datetime(value.edited_at or value.created_at),
+    )
+    description.add(DISCORD.channel, uri(value.channel))
+    for attachment in value.attachments:
+        description.add(DISCORD.attachment, uri(attachment))
+
+
+@describe.register
+def describe_thread(value: Thread, description: Description) -> None:
+    description.add(RDF.type, DISCORD.Thread)
+    description.add(DISCORD.name, Literal(value.name))
+    description.add(DISCORD.createdAt, xsd_datetime(value.created_at))
+    description.add(DISCORD.editedAt, xsd_datetime(value.created_at))
+    description.add(DISCORD.archived, xsd_boolean(value.archived))
+    if value.archived:
+        description.add(DISCORD.archivedAt, xsd_datetime(value.archive_timestamp))
+    if value.parent:
+        description.add(DISCORD.parent, uri(value.parent))
+
+
+@describe.register
+def describe_channel(value: GuildChannel, description: Description) -> None:
+    description.add(RDF.type, DISCORD.Channel)
+    description.add(DISCORD.name, Literal(value.name))
+    description.add(DISCORD.createdAt, xsd_datetime(value.created_at))
+    description.add(DISCORD.editedAt, xsd_datetime(value.created_at))
+    description.add(DISCORD.channelType, interned_literal(value.type.name))
+    if value.category:
+        description.add(DISCORD.category, uri(value.category))
+        description.add(
+            DISCORD.permissionsSynced,
+            xsd_boolean(value.permissions_synced),
+        )
+    if isinstance(value, (TextChannel, VocalGuildChannel, ForumChannel)):
+        description.add(DISCORD.nsfw, xsd_boolean(value.nsfw))
+    if isinstance(value, VocalGuildChannel):
+        description.add(DISCORD.userLimit, xsd_integer(value.user_limit))
+        description.add(DISCORD.bitRate, xsd_integer(value.bitrate))
+        description.add(
+            DISCORD.videoQualityMode,
+            interned_literal(value.video_quality_mode.name),
+        )
+        if value.rtc_region:
+            description.add(DISCORD.rtcRegion, Literal(value.rtc_region))
+    elif isinstance(value, TextChannel) and value.topic:
+        description.add(DISCORD.description, Literal(value.topic))
+
+
+@describe.register
+def describe_event(value: ScheduledEvent, description: Description) -> None:
+    creation_date = xsd_datetime(value.created_at)
+    description.add(RDF.type, DISCORD.ScheduledEvent)
+    description.add(DISCORD.name, Literal(value.name))
+    description.add(DISCORD.createdAt, creation_date)
+    description.add(DISCORD.editedAt, creation_date)
+    description.add(DISCORD.status, Literal(value.status.value))
+    description.add(DISCORD.startTime, xsd_datetime(value.start_time))
+    description.add(
+        DISCORD.locationType,
+        interned_literal(value.location.type.name),
+    )
+    if value.description:
+        description.add(DISCORD.description, Literal(value.description))
+    if value.end_time:
+        description.add(DISCORD.endTime, xsd_datetime(value.end_time))
+
+
+@describe.register
+def describe_stage(value: StageInstance, description: Description) -> None:
+    description.add(RDF.type, DISCORD.StageInstance)
+    description.add(DISCORD.description, Literal(value.topic))
+    description.add(
+        DISCORD.discoverableDisabled,
+        xsd_boolean(value.discoverable_disabled),
+    )
+    description.add(
+        DISCORD.privacyLevel,
+        interned_literal(value.privacy_level.name),
+    )
+
+
+@singledispatch
+def attributes(value: object) -> Tuple:
+    """
+    Collects the attributes that the description of a Python object is built from,
+    so that two versions of an object can be compared without describing them.
+    """
+    raise TypeError(f"Unable to collect attributes for type {type(value)}")
+
+
+_CHANNEL_ATTRIBUTES = ("name", "created_at", "type", "category", "permissions_synced")
+_USER_ATTRIBUTES = ("name", "display_name", "bot", "avatar", "global_name")
+
+attributes.register(Guild, attrgetter("name", "icon", "created_at"))
+attributes.register(Role, attrgetter("name", "created_at", "colour", "permissions"))
+attributes.register(
+    Emoji,
+    attrgetter("name", "created_at", "managed", "animated", "roles"),
+)
+attributes.register(
+    GuildSticker,
+    attrgetter("name", "emoji", "created_at", "description", "format"),
+)
+attributes.register(BaseUser, attrgetter(*_USER_ATTRIBUTES))
+attributes.register(
+    Member,
+    attrgetter(*_USER_ATTRIBUTES, "display_avatar", "created_at", "system", "roles"),
+)
+attributes.register(
+    Attachment,
+    attrgetter(
+        "id",
+        "filename",
+        "size",
+        "description",
+        "content_type",
+        "height",
+        "width",
+    ),
+)
+attributes.register(
+    Message,
+    attrgetter(
+        "clean_content",
+        "author",
+        "created_at",
+        "edited_at",
+        "channel",
+        "attachments",
+    ),
+)
+attributes.register(
+    Thread,
+    attrgetter("name", "created_at", "archived", "archive_timestamp", "parent"),
+)
+attributes.register(GuildChannel, attrgetter(*_CHANNEL_ATTRIBUTES))
+attributes.register(TextChannel, attrgetter(*_CHANNEL_ATTRIBUTES, "nsfw", "topic"))
+attributes.register(ForumChannel, attrgetter(*_CHANNEL_ATTRIBUTES, "nsfw"))
+attributes.register(
+    VocalGuildChannel,
+    attrgetter(
+        *_CHANNEL_ATTRIBUTES,
+        "nsfw",
+        "user_limit",
+        "bitrate",
+        "video_quality_mode",
+        "rtc_region",
+    ),
+)
+attributes.register(
+    ScheduledEvent,
+    attrgetter(
+        "name",
+        "created_at",
+        "status",
+        "start_time",
+        "location.type",
+        "description",
+        "end_time",
+    ),
+)
+attributes.register(
+    StageInstance,
+    attrgetter("topic", "discoverable_disabled", "privacy_level"),
+)
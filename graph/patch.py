@@ -1,21 +1,27 @@
 from io import BytesIO
 from enum import StrEnum
+from typing import Set
+from typing import List
+from typing import Tuple
 from typing import Optional
 from logging import info
 from logging import debug
-from difflib import unified_diff
 
+from rdflib.term import BNode
+from rdflib.term import URIRef
 from rdflib.graph import Graph
-from rdflib.compare import to_isomorphic
+from rdflib.compare import to_canonical_graph
 from rdflib.namespace import RDF
 
 from discord.file import File
 from discord.utils import utcnow
 
-from graph.convert import iso_datetime
+from client.config import PATCH_DIFF_LIMIT
+from graph.convert import Triple
+from graph.convert import fingerprint
 from graph.convert import xsd_datetime
-from graph.utilities import edited
-from graph.utilities import serialize
+from graph.storage import RemoteGraph
+from graph.storage import nt_term
 from graph.vocabulary import DISCORD
 
 
@@ -25,34 +31,102 @@ class PatchResult(StrEnum):
     UPDATE = "update"
 
 
-async def graph_diff(before: Graph, after: Graph) -> str:
-    """Creates a diff between two graphs."""
+class GraphPatch:
+    """
+    Result of patching a graph, holding the deleted and added triples. The patch
+    file is only rendered once requested, and not at all beyond the size limit, in
+    which case the triples are dropped and only their counts are kept.
+    """
 
-    before_string = await serialize(before)
-    before_edited = await edited(before)
+    def __init__(
+        self,
+        identifier: URIRef,
+        deleted: Set[Triple],
+        added: Set[Triple],
+    ) -> None:
+        self.identifier = identifier
+        self.parts: List[Tuple[Set[Triple], Set[Triple]]] = [(deleted, added)]
+        self.deleted = len(deleted)
+        self.added = len(added)
+        self.truncate()
 
-    after_string = await serialize(after)
-    after_edited = await edited(after)
+    @classmethod
+    def summarised(cls, identifier: URIRef, deleted: int, added: int) -> "GraphPatch":
+        """Creates a patch from modification counts alone, without a patch file."""
+        graph_patch = cls(identifier, set(), set())
+        graph_patch.parts.clear()
+        graph_patch.deleted = deleted
+        graph_patch.added = added
+        return graph_patch
 
-    diff_lines = unified_diff(
-        a=before_string.splitlines(),
-        b=after_string.splitlines(),
-        fromfiledate=iso_datetime(before_edited) if before_edited else "",
-        tofiledate=iso_datetime(after_edited) if after_edited else "",
-        lineterm="",
-    )
+    def merge(self, other: "GraphPatch") -> None:
+        """Appends the modifications of another patch to this one."""
+        # The file would be incomplete if either patch has dropped its triples
+        if self.parts and other.parts:
+            self.parts.extend(other.parts)
+        else:
+            self.parts.clear()
+        self.deleted += other.deleted
+        self.added += other.added
+        self.truncate()
+
+    def truncate(self) -> None:
+        """Drops the triples once the patch file would exceed the size limit."""
+        if self.deleted + self.added > PATCH_DIFF_LIMIT:
+            self.parts.clear()
+
+    def summary(self) -> str:
+        """Describes the patch in one line, for when the file is not rendered."""
+        return f"Sync: <{self.identifier}> (-{self.deleted}, +{self.added})"
+
+    async def file(self) -> Optional[File]:
+        """Renders the patch as RDF Patch, unless it exceeds the size limit."""
+        if not self.parts:
+            return None
+        patch_io = BytesIO()
+        for deleted, added in self.parts:
+            patch_io.write((await rdf_patch(deleted, added)).encode())
+        patch_io.seek(0)
+        return File(patch_io, "graph.rdfp")
+
+
+async def rdf_patch(deleted: Set[Triple], added: Set[Triple]) -> str:
+    """
+    Serializes modifications as one RDF Patch transaction, with the deletions before
+    the additions and both in sorted order, so the output only grows with the size
+    of the change and identical changes always produce identical patches.
+    """
 
-    return "\n".join(diff_lines)
+    deleted_rows = sorted(f"D {s.n3()} {p.n3()} {nt_term(o)} ." for s, p, o in deleted)
+    added_rows = sorted(f"A {s.n3()} {p.n3()} {nt_term(o)} ." for s, p, o in added)
 
+    return "\n".join(("TX .", *deleted_rows, *added_rows, "TC .", ""))
 
-async def patch(graph: Graph, before: Graph, after: Graph) -> Optional[File]:
+
+async def canonical(graph: Graph) -> Graph:
+    """
+    Relabels the blank nodes of a graph canonically, so that its triples can be
+    compared with those of another graph. The descriptions created from Discord
+    objects contain no blank nodes, so they are returned as they are.
+    """
+
+    for triple in graph:
+        if any(isinstance(term, BNode) for term in triple):
+            canonical_graph = Graph(identifier=graph.identifier)
+            canonical_graph += to_canonical_graph(graph)
+            return canonical_graph
+
+    return graph
+
+
+async def patch(graph: Graph, before: Graph, after: Graph) -> Optional[GraphPatch]:
     """Updates the graph by removing the old data and adding the new."""
 
     assert graph.identifier, "Graph patching requires a graph with identifier"
 
-    # Ensure the graphs can actually be compared
-    before = to_isomorphic(before)
-    after = to_isomorphic(after)
+    # Blank nodes need canonical labels for the triples to be comparable
+    before = await canonical(before)
+    after = await canonical(after)
 
     # Ensure the edit date is always assigned the latest value before comparison
     for subject in before.subjects(predicate=DISCORD.editedAt, unique=True):
@@ -61,12 +135,41 @@ async def patch(graph: Graph, before: Graph, after: Graph) -> Optional[File]:
             after_edit = after.value(subject=subject, predicate=DISCORD.editedAt)
             after.set((subject, DISCORD.editedAt, max(before_edit, after_edit)))
 
-    if before == after:
+    before_triples = set(before)
+    after_triples = set(after)
+
+    # Every stored subject carries a fingerprint of its description
+    after_triples.update(
+        (subject, DISCORD.fingerprint, fingerprint(after, subject))
+        for subject in after.subjects(unique=True)
+        if isinstance(subject, URIRef)
+    )
+
+    # Subjects stored before fingerprints were introduced only gain one, silently
+    edited_subjects = set(
+        subject
+        for subject, predicate, _ in before_triples.symmetric_difference(after_triples)
+        if predicate != DISCORD.fingerprint
+    )
+    migrated_triples = set(
+        (subject, predicate, value)
+        for subject, predicate, value in after_triples.difference(before_triples)
+        if predicate == DISCORD.fingerprint
+        and subject not in edited_subjects
+        and (subject, DISCORD.fingerprint, None) not in before
+    )
+
+    if migrated_triples:
+        debug(f"Fingerprinted {len(migrated_triples)} subjects in <{graph.identifier}>")
+        graph += migrated_triples
+        before_triples.update(migrated_triples)
+
+    if before_triples == after_triples:
         info(f"Unmodified <{graph.identifier}>")
         return
 
-    before_len = len(before)
-    after_len = len(after)
+    before_len = len(before_triples)
+    after_len = len(after_triples)
 
     if not before_len:
         result = PatchResult.CREATE
@@ -75,21 +178,21 @@ async def patch(graph: Graph, before: Graph, after: Graph) -> Optional[File]:
     else:
         result = PatchResult.UPDATE
 
-    deleted_triples = before - after
-    added_triples = after - before
+    deleted_triples = before_triples - after_triples
+    added_triples = after_triples - before_triples
 
     # Ensure the edit dates for all modified subjects are set to the current time
     if result == PatchResult.UPDATE:
         xsd_datetime_now = xsd_datetime(utcnow())
-        edited_subjects = set(deleted_triples.subjects(unique=True))
-        edited_subjects.update(added_triples.subjects(unique=True))
         for subject in edited_subjects.intersection(after.subjects(unique=True)):
             if (subject, RDF.type, DISCORD.Message) not in after:
-                for triple in before.triples((subject, DISCORD.editedAt, None)):
-                    deleted_triples.add(triple)
-                added_triples.set((subject, DISCORD.editedAt, xsd_datetime_now))
-                # The after timestamp needs to be updated for it to show in diff
-                after.set((subject, DISCORD.editedAt, xsd_datetime_now))
+                deleted_triples.update(
+                    before.triples((subject, DISCORD.editedAt, None))
+                )
+                added_triples.difference_update(
+                    after.triples((subject, DISCORD.editedAt, None))
+                )
+                added_triples.add((subject, DISCORD.editedAt, xsd_datetime_now))
             else:
                 debug(f"Skip edit time update for message <{subject}>")
 
@@ -111,9 +214,77 @@ async def patch(graph: Graph, before: Graph, after: Graph) -> Optional[File]:
         )
     )
 
-    diff_string = await graph_diff(before, after)
-    diff_io = BytesIO(diff_string.encode())
+    return GraphPatch(graph.identifier, deleted_triples, added_triples)
+
+
+async def insert(graph: Graph, after: Graph) -> GraphPatch:
+    """
+    Adds the descriptions of subjects that are not stored yet to the graph, without
+    fetching or comparing the stored state. Adding triples that happen to be stored
+    already has no effect, so repeated creation events remain harmless.
+    """
+
+    assert graph.identifier, "Graph insertion requires a graph with identifier"
+
+    added_triples = set(after)
+    added_triples.update(
+        (subject, DISCORD.fingerprint, fingerprint(after, subject))
+        for subject in after.subjects(unique=True)
+        if isinstance(subject, URIRef)
+    )
+
+    graph += added_triples
+
+    info(
+        "Sync: {} <{}> (-0, +{}, ={})".format(
+            PatchResult.CREATE.value,
+            graph.identifier,
+            len(added_triples),
+            len(added_triples),
+        )
+    )
+
+    return GraphPatch(graph.identifier, set(), added_triples)
+
+
+async def remove(
+    graph: RemoteGraph,
+    *subjects: URIRef,
+    follow: Optional[URIRef] = None,
+) -> Optional[GraphPatch]:
+    """
+    Deletes the stored descriptions of the subjects server-side. The deleted
+    triples are never collected, so the result only summarises their number.
+    """
+
+    deleted_len = await graph.delete(*subjects, follow=follow)
+
+    if not deleted_len:
+        info(f"Unmodified <{graph.identifier}>")
+        return
+
+    info(
+        "Sync: {} <{}> (-{}, +0, =0)".format(
+            PatchResult.DELETE.value,
+            graph.identifier,
+            deleted_len,
+        )
+    )
+
+    return GraphPatch.summarised(graph.identifier, deleted_len, 0)
+
+
+async def merge_patches(*patches: Optional[GraphPatch]) -> Optional[GraphPatch]:
+    """Combines the results of several patches into one."""
+
+    merged = None
 
-    patch_file = File(diff_io, f"graph.patch")
+    for graph_patch in patches:
+        if not graph_patch:
+            continue
+        elif merged:
+            merged.merge(graph_patch)
+        else:
+            merged = graph_patch
 
-    return patch_file
+    return merged
@@ -0,0 +1,130 @@
+from typing import Optional
+from datetime import datetime
+
+from rdflib.term import URIRef
+from rdflib.term import Variable
+from rdflib.namespace import RDF
+
+from graph.convert import xsd_datetime
+from graph.convert import python_datetime
+from graph.storage import RemoteGraph
+from graph.vocabulary import DISCORD
+
+
+async def watermark_uri(guild_uri: URIRef) -> URIRef:
+    """Constructs the URI of the synchronisation watermark of a guild graph."""
+    return URIRef(f"{guild_uri}/synchronisation")
+
+
+async def cursor_uri(channel_uri: URIRef) -> URIRef:
+    """Constructs the URI of the crawl cursor of a channel."""
+    return URIRef(f"{channel_uri}/crawl")
+
+
+async def read_watermark(graph: RemoteGraph) -> Optional[datetime]:
+    """Reads the time up to which the stored guild reflects the Discord state."""
+
+    subject = await watermark_uri(graph.identifier)
+    variable_value = Variable("value")
+
+    result = await graph.query(
+        f"SELECT ?value WHERE {{ <{subject}> <{DISCORD.synchronisedAt}> ?value }}"
+    )
+
+    values = [python_datetime(bindings[variable_value]) for bindings in result.bindings]
+
+    return max(values) if values else None
+
+
+async def write_watermark(graph: RemoteGraph, value: datetime) -> None:
+    """Stores the time up to which the stored guild reflects the Discord state."""
+
+    subject = await watermark_uri(graph.identifier)
+
+    await graph.update(
+        f"""
+            DELETE {{
+                GRAPH <{graph.identifier}> {{
+                    <{subject}> <{DISCORD.synchronisedAt}> ?value
+                }}
+            }}
+            INSERT {{
+                GRAPH <{graph.identifier}> {{
+                    <{subject}> <{RDF.type}> <{DISCORD.Synchronisation}> ;
+                        <{DISCORD.synchronisedAt}> {xsd_datetime(value).n3()}
+                }}
+            }}
+            WHERE {{
+                OPTIONAL {{
+                    GRAPH <{graph.identifier}> {{
+                        <{subject}> <{DISCORD.synchronisedAt}> ?value
+                    }}
+                }}
+            }}
+        """
+    )
+
+
+async def read_cursor(graph: RemoteGraph, channel_uri: URIRef) -> Optional[URIRef]:
+    """Reads the last message stored by an unfinished crawl of the channel."""
+
+    subject = await cursor_uri(channel_uri)
+    variable_message = Variable("message")
+
+    result = await graph.query(
+        f"SELECT ?message WHERE {{ <{subject}> <{DISCORD.crawledMessage}> ?message }}"
+    )
+
+    messages = [bindings[variable_message] for bindings in result.bindings]
+
+    return messages[0] if messages else None
+
+
+async def write_cursor(
+    graph: RemoteGraph,
+    channel_uri: URIRef,
+    message_uri: URIRef,
+) -> None:
+    """Stores the last message stored by the ongoing crawl of the channel."""
+
+    subject = await cursor_uri(channel_uri)
+
+    await graph.update(
+        f"""
+            DELETE {{
+                GRAPH <{graph.identifier}> {{
+                    <{subject}> <{DISCORD.crawledMessage}> ?message
+                }}
+            }}
+            INSERT {{
+                GRAPH <{graph.identifier}> {{
+                    <{subject}> <{RDF.type}> <{DISCORD.CrawlCursor}> ;
+                        <{DISCORD.channel}> <{channel_uri}> ;
+                        <{DISCORD.crawledMessage}> <{message_uri}>
+                }}
+            }}
+            WHERE {{
+                OPTIONAL {{
+                    GRAPH <{graph.identifier}> {{
+                        <{subject}> <{DISCORD.crawledMessage}> ?message
+                    }}
+                }}
+            }}
+        """
+    )
+
+
+async def delete_cursor(graph: RemoteGraph, channel_uri: URIRef) -> None:
+    """Removes the crawl cursor of the channel once its crawl has finished."""
+
+    subject = await cursor_uri(channel_uri)
+
+    await graph.update(
+        f"""
+            DELETE WHERE {{
+                GRAPH <{graph.identifier}> {{
+                    <{subject}> ?p ?o
+                }}
+            }}
+        """
+    )
@@ -1,23 +1,425 @@
+from io import BytesIO
+from time import monotonic
+from asyncio import Lock
+from asyncio import Task
+from asyncio import sleep
+from asyncio import create_task
+from gzip import compress
+from itertools import batched
 from typing import Dict
+from typing import Set
+from typing import Tuple
+from typing import Iterable
+from typing import Optional
 from platform import python_version
 from platform import system
 from platform import machine
 from platform import python_implementation
+from logging import debug
+from logging import error
+from logging import exception
 
+from aiohttp import BasicAuth
+from aiohttp import ClientSession
+from aiohttp import ClientTimeout
+from aiohttp import TCPConnector
+
+from rdflib.term import Node
 from rdflib.term import URIRef
+from rdflib.term import Literal
+from rdflib.term import Variable
 from rdflib.graph import Graph
-from rdflib.graph import Dataset
-from rdflib.store import Store
-from rdflib.plugins.stores.sparqlstore import SPARQLUpdateStore
+from rdflib.query import Result
+from rdflib.namespace import RDF
 
 from discord import version_info
 
 from client.bot import bot
 from client.config import SPARQL_ENDPOINT_QUERY
 from client.config import SPARQL_ENDPOINT_UPDATE
+from client.config import SPARQL_ENDPOINT_GRAPH
 from client.config import SPARQL_AUTH
+from client.config import SPARQL_CONNECTIONS
+from client.config import SPARQL_TIMEOUT
+from client.config import SPARQL_BATCH_SIZE
+from client.config import SPARQL_BATCH_DELAY
+from graph.convert import Triple
+from graph.vocabulary import DISCORD
+
+
+class AsyncSPARQLStore:
+    """SPARQL 1.1 Protocol client sharing one pooled keep-alive HTTP session."""
+
+    def __init__(self, user_agent: str) -> None:
+        self.session = ClientSession(
+            connector=TCPConnector(limit=SPARQL_CONNECTIONS),
+            timeout=ClientTimeout(total=SPARQL_TIMEOUT),
+            headers={"User-Agent": user_agent},
+            auth=BasicAuth(*SPARQL_AUTH) if SPARQL_AUTH else None,
+        )
+
+    async def _post(
+        self,
+        endpoint: str,
+        data: Dict[str, str],
+        accept: str,
+    ) -> Tuple[str, bytes]:
+        """Sends a form-encoded request, returning the content type and body."""
+        async with self.session.post(
+            endpoint,
+            data=data,
+            headers={"Accept": accept},
+        ) as response:
+            response.raise_for_status()
+            return response.content_type, await response.read()
+
+    async def query(self, query: str, graph: Optional[URIRef] = None) -> Result:
+        """Evaluates a SELECT or ASK query, optionally against a default graph."""
+        data = {"query": query}
+        if graph:
+            data["default-graph-uri"] = str(graph)
+        _, body = await self._post(
+            SPARQL_ENDPOINT_QUERY,
+            data,
+            "application/sparql-results+json",
+        )
+        return Result.parse(source=BytesIO(body), format="json")
+
+    async def construct(self, query: str, graph: Optional[URIRef] = None) -> Graph:
+        """Evaluates a CONSTRUCT or DESCRIBE query into a local graph."""
+        data = {"query": query}
+        if graph:
+            data["default-graph-uri"] = str(graph)
+        content_type, body = await self._post(
+            SPARQL_ENDPOINT_QUERY,
+            data,
+            "application/n-triples, text/turtle;q=0.9",
+        )
+        result = Graph()
+        result.parse(data=body, format=content_type)
+        return result
+
+    async def update(self, update: str) -> None:
+        """Executes a SPARQL update request."""
+        await self._post(SPARQL_ENDPOINT_UPDATE, {"update": update}, "*/*")
+
+    async def insert(self, graph: URIRef, triples: Iterable[Triple]) -> None:
+        """
+        Adds triples to a named graph in chunks. With a Graph Store Protocol endpoint
+        configured, the chunks are posted as gzipped N-Triples for the store to bulk
+        load, otherwise they are sent as INSERT DATA updates.
+        """
+        for chunk in batched(triples, SPARQL_BATCH_SIZE):
+            if SPARQL_ENDPOINT_GRAPH:
+                async with self.session.post(
+                    SPARQL_ENDPOINT_GRAPH,
+                    params={"graph": str(graph)},
+                    data=compress(f"{ntriples(chunk)}\n".encode()),
+                    headers={
+                        "Content-Type": "application/n-triples",
+                        "Content-Encoding": "gzip",
+                    },
+                ) as response:
+                    response.raise_for_status()
+            else:
+                await self.update(
+                    f"INSERT DATA {{ GRAPH <{graph}> {{\n{ntriples(chunk)}\n}} }}"
+                )
 
-_cache: Dict[str, Store | Dataset] = {}
+    async def drop(self, graph: URIRef) -> None:
+        """Removes a named graph with all its triples, if it exists."""
+        await self.update(f"DROP SILENT GRAPH <{graph}>")
+
+    async def close(self) -> None:
+        """Closes the pooled HTTP session."""
+        await self.session.close()
+
+
+class RemoteGraph:
+    """
+    Named graph on the SPARQL endpoint, with write-behind batching of modifications.
+    Committed modifications are buffered per graph and flushed as one combined
+    DELETE DATA and INSERT DATA request once the buffer reaches the size threshold
+    or the flush delay elapses, with the delay chosen per commit. Reads flush the
+    buffer first, so they always see the previously committed modifications.
+    """
+
+    def __init__(self, store: AsyncSPARQLStore, identifier: URIRef) -> None:
+        self.store = store
+        self.identifier = identifier
+        self.deleted: Set[Triple] = set()
+        self.added: Set[Triple] = set()
+        self.lock = Lock()
+        self.flush_task: Optional[Task] = None
+        self.flush_deadline = 0.0
+        self.buffered_at: Optional[float] = None
+        self.flushes = 0
+        self.flushed_triples = 0
+        self.flushed_seconds = 0.0
+
+    def __iadd__(self, triples: Iterable[Triple]) -> "RemoteGraph":
+        if self.buffered_at is None:
+            self.buffered_at = monotonic()
+        for triple in triples:
+            self.deleted.discard(triple)
+            self.added.add(triple)
+        return self
+
+    def __isub__(self, triples: Iterable[Triple]) -> "RemoteGraph":
+        if self.buffered_at is None:
+            self.buffered_at = monotonic()
+        for triple in triples:
+            self.added.discard(triple)
+            self.deleted.add(triple)
+        return self
+
+    def pending(self) -> int:
+        """The number of buffered modifications."""
+        return len(self.deleted) + len(self.added)
+
+    async def query(self, query: str) -> Result:
+        """Evaluates a SELECT or ASK query against this graph."""
+        await self.flush()
+        return await self.store.query(query, self.identifier)
+
+    async def construct(self, query: str) -> Graph:
+        """Evaluates a CONSTRUCT query against this graph."""
+        await self.flush()
+        return await self.store.construct(query, self.identifier)
+
+    async def update(self, update: str) -> None:
+        """Executes an update request after the buffered modifications."""
+        await self.flush()
+        await self.store.update(update)
+
+    async def cbd(self, *subjects: URIRef, follow: Optional[URIRef] = None) -> Graph:
+        """
+        Collects the Concise Bounded Descriptions of the subjects in one request.
+        When a predicate to follow is given, the descriptions of the objects linked
+        from the subjects through that predicate are collected as well.
+        """
+        if not subjects:
+            return Graph()
+        values = " ".join(subject.n3() for subject in subjects)
+        return await self.describe(f"VALUES ?subject {{ {values} }}", follow)
+
+    async def fingerprints(
+        self,
+        *subjects: URIRef,
+        type: Optional[URIRef] = None,
+    ) -> Dict[URIRef, Optional[Literal]]:
+        """
+        Collects the stored description fingerprints of the subjects, or of all the
+        instances of a class, in one request. Subjects that are not stored or have
+        no fingerprint yet are mapped to None.
+        """
+        if type:
+            pattern = f"?subject <{RDF.type}> {type.n3()} ."
+        elif subjects:
+            values = " ".join(subject.n3() for subject in subjects)
+            pattern = f"VALUES ?subject {{ {values} }}"
+        else:
+            return {}
+        result = await self.query(
+            f"""
+                SELECT ?subject ?fingerprint WHERE {{
+                    {pattern}
+                    OPTIONAL {{ ?subject <{DISCORD.fingerprint}> ?fingerprint }}
+                }}
+            """
+        )
+        variable_subject = Variable("subject")
+        variable_fingerprint = Variable("fingerprint")
+        return {
+            bindings[variable_subject]: bindings.get(variable_fingerprint)
+            for bindings in result.bindings
+        }
+
+    async def instances(self, type: URIRef) -> Graph:
+        """Collects the Concise Bounded Descriptions of all instances of a class."""
+        return await self.describe(f"?subject <{RDF.type}> {type.n3()} .")
+
+    async def describe(self, pattern: str, follow: Optional[URIRef] = None) -> Graph:
+        """
+        Collects the Concise Bounded Descriptions of the ?subject bindings of a
+        graph pattern server-side, including the blank nodes they directly refer to.
+        """
+        root_pattern = (
+            f"?subject {follow.n3()}? ?root ." if follow else "BIND(?subject AS ?root)"
+        )
+        return await self.construct(
+            f"""
+                CONSTRUCT {{ ?s ?p ?o }} WHERE {{
+                    {pattern}
+                    {root_pattern}
+                    {{
+                        ?root ?p ?o .
+                        BIND(?root AS ?s)
+                    }} UNION {{
+                        ?root ?q ?s .
+                        FILTER(isBlank(?s))
+                        ?s ?p ?o .
+                    }}
+                }}
+            """
+        )
+
+    async def delete(self, *subjects: URIRef, follow: Optional[URIRef] = None) -> int:
+        """
+        Deletes the descriptions of the subjects server-side, along with those of the
+        objects linked from them through the followed predicate, without collecting
+        them first. Returns the number of deleted triples.
+        """
+        if not subjects:
+            return 0
+        values = " ".join(subject.n3() for subject in subjects)
+        root_pattern = f"?subject {follow.n3()}? ?root ." if follow else ""
+        root = "?root" if follow else "?subject"
+        pattern = f"VALUES ?subject {{ {values} }} {root_pattern} {root} ?p ?o ."
+        result = await self.query(
+            f"""
+                SELECT (COUNT(*) AS ?count) WHERE {{
+                    SELECT DISTINCT {root} ?p ?o WHERE {{ {pattern} }}
+                }}
+            """
+        )
+        count = int(result.bindings[0][Variable("count")]) if result.bindings else 0
+        if count:
+            await self.update(
+                f"""
+                    WITH <{self.identifier}>
+                    DELETE {{ {root} ?p ?o }}
+                    WHERE {{ {pattern} }}
+                """
+            )
+        return count
+
+    def discard(self) -> None:
+        """Drops the buffered modifications without writing them."""
+        if self.flush_task:
+            self.flush_task.cancel()
+            self.flush_task = None
+        self.deleted.clear()
+        self.added.clear()
+        self.buffered_at = None
+
+    async def drop(self) -> None:
+        """Removes the whole graph, discarding any buffered modifications."""
+        async with self.lock:
+            self.discard()
+            await self.store.drop(self.identifier)
+
+    async def commit(self, delay: float = SPARQL_BATCH_DELAY) -> None:
+        """
+        Schedules the buffered modifications to be written to the endpoint within
+        the delay, or immediately once the buffer reaches the size threshold. A
+        shorter delay brings an already scheduled write forward.
+        """
+        if self.pending() >= SPARQL_BATCH_SIZE:
+            await self.flush()
+        elif self.pending():
+            deadline = monotonic() + delay
+            # The scheduled write is still sleeping, so it can be safely rescheduled
+            if self.flush_task and deadline < self.flush_deadline:
+                self.flush_task.cancel()
+                self.flush_task = None
+            if not self.flush_task:
+                self.flush_deadline = deadline
+                self.flush_task = create_task(self.delayed_flush(delay))
+
+    async def delayed_flush(self, delay: float) -> None:
+        """Flushes the buffered modifications once the flush delay has elapsed."""
+        await sleep(delay)
+        self.flush_task = None
+        try:
+            await self.flush()
+        except Exception as ex:
+            error(f"Unable to flush <{self.identifier}>, retrying with next commit")
+            exception(ex)
+
+    async def flush(self) -> None:
+        """
+        Sends the buffered modifications to the endpoint in one update request, or
+        through the bulk insertion of the store when they only add triples, as when
+        a guild is first ingested.
+        """
+        async with self.lock:
+            deleted, self.deleted = self.deleted, set()
+            added, self.added = self.added, set()
+            buffered_at, self.buffered_at = self.buffered_at, None
+            operations = []
+            if deleted:
+                operations.append(
+                    f"DELETE DATA {{ GRAPH <{self.identifier}> {{\n"
+                    f"{ntriples(deleted)}\n}} }}"
+                )
+            if deleted and added:
+                operations.append(
+                    f"INSERT DATA {{ GRAPH <{self.identifier}> {{\n"
+                    f"{ntriples(added)}\n}} }}"
+                )
+            if deleted or added:
+                request_start = monotonic()
+                try:
+                    if operations:
+                        await self.store.update(" ;\n".join(operations))
+                    else:
+                        await self.store.insert(self.identifier, added)
+                except Exception:
+                    # Put the failed batch back in front of anything buffered since
+                    self.deleted.update(deleted.difference(self.added))
+                    self.added.update(added.difference(self.deleted))
+                    self.buffered_at = min(buffered_at, self.buffered_at or buffered_at)
+                    raise
+                flushed_at = monotonic()
+                self.flushes += 1
+                self.flushed_triples += len(deleted) + len(added)
+                self.flushed_seconds += flushed_at - request_start
+                debug(
+                    "Flushed <{}> (-{}, +{}) in {:.3f} seconds, {:.3f} seconds "
+                    "after buffering ({} flushes of {:.0f} triples in {:.3f} seconds "
+                    "on average)".format(
+                        self.identifier,
+                        len(deleted),
+                        len(added),
+                        flushed_at - request_start,
+                        flushed_at - (buffered_at or request_start),
+                        self.flushes,
+                        self.flushed_triples / self.flushes,
+                        self.flushed_seconds / self.flushes,
+                    )
+                )
+
+
+_cache: Dict[str, AsyncSPARQLStore] = {}
+_graphs: Dict[URIRef, RemoteGraph] = {}
+
+
+def ntriples(triples: Iterable[Triple]) -> str:
+    """Serializes triples into N-Triples lines for use in SPARQL data blocks."""
+    return "\n".join(f"{s.n3()} {p.n3()} {nt_term(o)} ." for s, p, o in triples)
+
+
+def nt_term(term: Node) -> str:
+    """
+    Serializes a term as in N-Triples, where literals are escaped to fit on one
+    line, unlike the long Turtle strings produced for multi-line literals.
+    """
+    if not isinstance(term, Literal):
+        return term.n3()
+    lexical = (
+        str(term)
+        .replace("\\", "\\\\")
+        .replace('"', '\\"')
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+    if term.language:
+        return f'"{lexical}"@{term.language}'
+    elif term.datatype:
+        return f'"{lexical}"^^<{term.datatype}>'
+    else:
+        return f'"{lexical}"'
 
 
 async def user_agent() -> str:
@@ -33,35 +435,29 @@ async def user_agent() -> str:
     return ua_header
 
 
-async def store() -> Store:
+async def store() -> AsyncSPARQLStore:
     """Creates the SPARQL store instance to back all the graphs."""
     if "store" not in _cache:
-        _cache["store"] = SPARQLUpdateStore(
-            query_endpoint=SPARQL_ENDPOINT_QUERY,
-            update_endpoint=SPARQL_ENDPOINT_UPDATE,
-            sparql11=True,
-            context_aware=True,
-            autocommit=False,
-            method="POST_FORM",
-            returnFormat="json",
-            headers={"User-Agent": await user_agent()},
-            auth=SPARQL_AUTH,
-        )
+        ua_header = await user_agent()
+        # Another caller may have created the store while awaiting the header
+        if "store" not in _cache:
+            _cache["store"] = AsyncSPARQLStore(user_agent=ua_header)
     return _cache["store"]
 
 
-async def dataset() -> Dataset:
-    """Creates the RDF dataset instance where all the graphs are managed."""
-    if "dataset" not in _cache:
-        _cache["dataset"] = Dataset(
-            store=await store(),
-            default_union=True,
-        )
-    return _cache["dataset"]
+async def close_store() -> None:
+    """Closes the SPARQL store, flushing any buffered modifications first."""
+    for remote_graph in _graphs.values():
+        if remote_graph.flush_task:
+            remote_graph.flush_task.cancel()
+        await remote_graph.flush()
+    if "store" in _cache:
+        await _cache.pop("store").close()
 
 
-async def graph(uri: URIRef) -> Graph:
+async def graph(uri: URIRef) -> RemoteGraph:
     """Creates the RDF graph for the specificed URI, or returns an existing one."""
-    default_dataset = await dataset()
-    uri_graph = default_dataset.graph(identifier=uri)
-    return uri_graph
+    if uri not in _graphs:
+        remote_store = await store()
+        _graphs.setdefault(uri, RemoteGraph(store=remote_store, identifier=uri))
+    return _graphs[uri]
@@ -1,8 +1,6 @@
 from enum import StrEnum
-from logging import warning
 from datetime import datetime
 from urllib.parse import urlparse
-from urllib.error import HTTPError
 
 from rdflib.term import URIRef
 from rdflib.graph import Graph
@@ -25,22 +23,6 @@ class SerializationFormat(StrEnum):
     XML = "xml"
 
 
-async def copy(graph: Graph) -> Graph:
-    """Creates a local copy of a graph, mostly for performance reasons."""
-
-    assert graph.identifier, "Attempting to copy a graph without identifier"
-
-    local_graph = Graph(identifier=graph.identifier)
-
-    try:
-        local_graph += graph
-    except HTTPError:
-        # When requesting a non-existing graph, the server seems to send status 400
-        warning(f"Creating a local copy of empty gaph <{graph.identifier}>")
-
-    return local_graph
-
-
 async def edited(*graphs: Graph) -> datetime | None:
     """Finds the latest edited_at date from graphs."""
 
@@ -76,6 +58,11 @@ async def create_thread_uri(guild_id: int, thread_id: int) -> URIRef:
     return URIRef(f"{DISCORD_URI}/channels/{guild_id}/{thread_id}")
 
 
+async def parse_snowflake(uri: URIRef) -> int:
+    """Extracts the trailing Snowflake ID from a Discord URI."""
+    return int(uri.rsplit("/", 1)[-1])
+
+
 async def parse_discord_uri(uri: str) -> URIRef:
     """Parses and validates a Discord URI."""
 
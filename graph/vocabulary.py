@@ -1,3 +1,5 @@
+from inspect import get_annotations
+
 from rdflib.term import URIRef
 from rdflib.namespace import Namespace
 from rdflib.namespace import DefinedNamespace
@@ -18,6 +20,7 @@ class DISCORD(DefinedNamespace):
 
     Attachment: URIRef
     Channel: URIRef
+    CrawlCursor: URIRef
     Emoji: URIRef
     Guild: URIRef
     GuildSticker: URIRef
@@ -26,6 +29,7 @@ class DISCORD(DefinedNamespace):
     ScheduledEvent: URIRef
     Snowflake: URIRef
     StageInstance: URIRef
+    Synchronisation: URIRef
     Thread: URIRef
     User: URIRef
 
@@ -43,6 +47,7 @@ class DISCORD(DefinedNamespace):
     colour: URIRef  # Colour representation as hexadecimal
     content: URIRef  # The message content as a string
     contentType: URIRef  # The mimetype of attachment or sticker
+    crawledMessage: URIRef  # The last message stored by an unfinished channel crawl
     createdAt: URIRef  # Creation time of something as xsd:dateTime
     description: URIRef  # Textual description of a channel, attachment, etc.
     discoverableDisabled: URIRef  # Something related to StageInstances
@@ -51,6 +56,7 @@ class DISCORD(DefinedNamespace):
     editedAt: URIRef  # Modification time of something as xsd:dateTime
     emoji: URIRef  # The unicode emoji that represents a sticker
     endTime: URIRef  # The end time of a scheduled event
+    fingerprint: URIRef  # Hash of the description of a subject, besides edit time
     globalName: URIRef  # The global name of a user
     heightPixels: URIRef  # Image height as xsd:integer
     icon: URIRef  # The URI of the server icon
@@ -68,7 +74,13 @@ class DISCORD(DefinedNamespace):
     sizeBytes: URIRef  # The size of something in bytes
     startTime: URIRef  # The start time of a scheduled event
     status: URIRef  # The status of a scheduled event
+    synchronisedAt: URIRef  # Datetime up to which a guild graph reflects Discord
     system: URIRef  # Boolean indicating whether the user is a system user
     userLimit: URIRef  # The voice channel user limit as xsd:integer
     videoQualityMode: URIRef  # The voice channel video quality mode as a string
     widthPixels: URIRef  # Image width as xsd:integer
+
+
+# Bind the terms as class attributes, so that lookups skip the namespace machinery
+for _name in get_annotations(DISCORD):
+    setattr(DISCORD, _name, DISCORD[_name])
@@ -0,0 +1,73 @@
+from asyncio import run
+from typing import Dict
+from typing import List
+from typing import Tuple
+from typing import Optional
+
+from rdflib.term import URIRef
+from rdflib.term import Literal
+from rdflib.term import Variable
+
+from graph.convert import iso_datetime
+from graph.convert import python_datetime
+from graph.convert import snowflake_datetime
+from graph.storage import AsyncSPARQLStore
+from graph.utilities import parse_snowflake
+from graph.vocabulary import DISCORD
+
+
+async def report() -> None:
+    """Prints the backfill progress of the stored guilds, without using Discord."""
+
+    remote_store = AsyncSPARQLStore(user_agent="Quill/1.0 (report)")
+
+    try:
+        result = await remote_store.query(
+            f"""
+                SELECT ?g ?synchronised ?channel ?message WHERE {{
+                    GRAPH ?g {{
+                        {{
+                            ?state <{DISCORD.synchronisedAt}> ?synchronised
+                        }} UNION {{
+                            ?cursor <{DISCORD.channel}> ?channel ;
+                                <{DISCORD.crawledMessage}> ?message
+                        }}
+                    }}
+                }}
+            """
+        )
+    finally:
+        await remote_store.close()
+
+    variable_g = Variable("g")
+    variable_synchronised = Variable("synchronised")
+    variable_channel = Variable("channel")
+    variable_message = Variable("message")
+
+    watermarks: Dict[URIRef, Optional[Literal]] = {}
+    cursors: Dict[URIRef, List[Tuple[URIRef, URIRef]]] = {}
+
+    for bindings in result.bindings:
+        guild_uri = bindings[variable_g]
+        watermarks.setdefault(guild_uri, None)
+        cursors.setdefault(guild_uri, [])
+        if variable_synchronised in bindings:
+            watermarks[guild_uri] = bindings[variable_synchronised]
+        else:
+            cursors[guild_uri].append(
+                (bindings[variable_channel], bindings[variable_message])
+            )
+
+    for guild_uri, watermark in sorted(watermarks.items()):
+        if watermark:
+            state = f"synchronised up to {iso_datetime(python_datetime(watermark))}"
+        else:
+            state = "initial backfill in progress"
+        print(f"<{guild_uri}> {state}, {len(cursors[guild_uri])} unfinished crawls")
+        for channel_uri, message_uri in sorted(cursors[guild_uri]):
+            message_date = snowflake_datetime(await parse_snowflake(message_uri))
+            print(f"  <{channel_uri}> crawled up to {iso_datetime(message_date)}")
+
+
+if __name__ == "__main__":
+    run(report())
@@ -0,0 +1,35 @@
+from typing import Iterable
+
+from rdflib.term import URIRef
+from rdflib.graph import Graph
+from rdflib.graph import Dataset
+from rdflib.query import Result
+
+from graph.convert import Triple
+
+
+class DatasetStore:
+    """Store that evaluates the requests against an in-memory dataset."""
+
+    def __init__(self) -> None:
+        self.dataset = Dataset()
+
+    async def query(self, query: str, graph: URIRef) -> Result:
+        return self.dataset.graph(graph).query(query)
+
+    async def construct(self, query: str, graph: URIRef) -> Graph:
+        result = Graph()
+        for triple in self.dataset.graph(graph).query(query):
+            result.add(triple)
+        return result
+
+    async def update(self, update: str) -> None:
+        self.dataset.update(update)
+
+    async def insert(self, graph: URIRef, triples: Iterable[Triple]) -> None:
+        stored_graph = self.dataset.graph(graph)
+        for triple in triples:
+            stored_graph.add(triple)
+
+    async def drop(self, graph: URIRef) -> None:
+        self.dataset.remove_graph(graph)
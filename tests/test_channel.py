@@ -0,0 +1,113 @@
+from os import environ
+from asyncio import sleep
+from datetime import datetime
+from datetime import timezone
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import MagicMock
+
+environ.setdefault("DISCORD_TOKEN", "test")
+environ.setdefault("SPARQL_ENDPOINT", "http://localhost/sparql")
+
+from rdflib.term import URIRef  # noqa: E402
+from rdflib.namespace import RDF  # noqa: E402
+
+from discord.errors import Forbidden  # noqa: E402
+from discord.channel import TextChannel  # noqa: E402
+from discord.utils import time_snowflake  # noqa: E402
+from discord.utils import utcnow  # noqa: E402
+
+from graph.convert import xsd_datetime  # noqa: E402
+from graph.convert import snowflake_datetime  # noqa: E402
+from graph.state import read_cursor  # noqa: E402
+from graph.state import write_cursor  # noqa: E402
+from graph.storage import RemoteGraph  # noqa: E402
+from graph.utilities import create_message_uri  # noqa: E402
+from graph.vocabulary import DISCORD  # noqa: E402
+from updates.channel import stream_channel_content  # noqa: E402
+from updates.channel import patch_channel_changes  # noqa: E402
+from tests.store import DatasetStore  # noqa: E402
+
+GUILD = URIRef("https://discord.com/guilds/1")
+CHANNEL = URIRef("https://discord.com/channels/1/2")
+OLD_ID = time_snowflake(datetime(2020, 1, 1, tzinfo=timezone.utc))
+
+
+class ChannelCrawlTest(IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.store = DatasetStore()
+        self.graph = RemoteGraph(self.store, GUILD)
+        self.channel = MagicMock(spec=TextChannel)
+        self.channel.jump_url = str(CHANNEL)
+
+    async def store_message(self, message_id: int) -> URIRef:
+        message_uri = await create_message_uri(1, 2, message_id)
+        self.graph += [
+            (message_uri, RDF.type, DISCORD.Message),
+            (message_uri, DISCORD.channel, CHANNEL),
+            (
+                message_uri,
+                DISCORD.createdAt,
+                xsd_datetime(snowflake_datetime(message_id)),
+            ),
+        ]
+        await self.graph.flush()
+        return message_uri
+
+    async def stored(self, message_uri: URIRef) -> bool:
+        await self.graph.flush()
+        return (message_uri, None, None) in self.store.dataset.graph(GUILD)
+
+    async def test_messages_stored_during_crawl_are_kept(self) -> None:
+        old_uri = await self.store_message(OLD_ID)
+        new_uris = []
+
+        async def history(**kwargs):
+            # The message event is handled while the history is being requested
+            await sleep(0.01)
+            new_uris.append(await self.store_message(time_snowflake(utcnow())))
+            return
+            yield
+
+        self.channel.history = history
+
+        await stream_channel_content(self.graph, self.channel)
+
+        self.assertFalse(await self.stored(old_uri))
+        self.assertTrue(await self.stored(new_uris[0]))
+
+    async def test_interrupted_crawl_keeps_unseen_messages(self) -> None:
+        old_uri = await self.store_message(OLD_ID)
+
+        async def history(**kwargs):
+            raise Forbidden(MagicMock(status=403), "Missing Access")
+            yield
+
+        self.channel.history = history
+
+        await stream_channel_content(self.graph, self.channel)
+
+        self.assertTrue(await self.stored(old_uri))
+        self.assertIsNone(await read_cursor(self.graph, CHANNEL))
+
+    async def test_incremental_update_resumes_interrupted_crawl(self) -> None:
+        old_uri = await self.store_message(OLD_ID)
+        cursor_uri = await self.store_message(OLD_ID + 1)
+        await write_cursor(self.graph, CHANNEL, old_uri)
+        await write_cursor(self.graph, CHANNEL, cursor_uri)
+        requests = []
+
+        async def history(**kwargs):
+            requests.append(kwargs)
+            return
+            yield
+
+        self.channel.history = history
+
+        self.assertEqual(await read_cursor(self.graph, CHANNEL), cursor_uri)
+
+        await patch_channel_changes(self.graph, self.channel)
+
+        self.assertEqual(requests[0]["after"].id, OLD_ID + 1)
+        self.assertTrue(await self.stored(old_uri))
+        self.assertTrue(await self.stored(cursor_uri))
+        self.assertIsNone(await read_cursor(self.graph, CHANNEL))
@@ -0,0 +1,106 @@
+from os import environ
+from asyncio import gather
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+environ.setdefault("DISCORD_TOKEN", "test")
+environ.setdefault("SPARQL_ENDPOINT", "http://localhost/sparql")
+
+from discord.guild import Guild  # noqa: E402
+from discord.role import Role  # noqa: E402
+from discord.user import User  # noqa: E402
+from discord.member import Member  # noqa: E402
+from discord.raw_models import RawMemberRemoveEvent  # noqa: E402
+
+from events.utilities import coalesce_updates  # noqa: E402
+from events.utilities import supersede_coalesced_updates  # noqa: E402
+
+handled = []
+
+
+@coalesce_updates
+async def on_member_update(before: Member, after: Member) -> None:
+    handled.append(after)
+
+
+@coalesce_updates
+async def on_guild_role_update(before: Role, after: Role) -> None:
+    handled.append(after)
+
+
+@supersede_coalesced_updates
+async def on_raw_member_remove(payload: RawMemberRemoveEvent) -> None:
+    pass
+
+
+@supersede_coalesced_updates
+async def on_guild_remove(guild: Guild) -> None:
+    pass
+
+
+def member(guild: Guild, name: str) -> Member:
+    return MagicMock(spec=Member, id=5, guild=guild, display_name=name)
+
+
+class CoalesceTest(IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        handled.clear()
+        quiet_period = patch("events.utilities.UPDATE_QUIET_PERIOD", 0.05)
+        quiet_period.start()
+        self.addCleanup(quiet_period.stop)
+        self.first_guild = MagicMock(spec=Guild, id=1)
+        self.second_guild = MagicMock(spec=Guild, id=2)
+
+    async def test_bursts_are_handled_once_with_latest_state(self) -> None:
+        first = member(self.first_guild, "first")
+        latest = member(self.first_guild, "latest")
+
+        await gather(
+            on_member_update(first, first),
+            on_member_update(first, latest),
+        )
+
+        self.assertEqual(handled, [latest])
+
+    async def test_member_updates_are_coalesced_per_guild(self) -> None:
+        first = member(self.first_guild, "first")
+        second = member(self.second_guild, "second")
+
+        await gather(
+            on_member_update(first, first),
+            on_member_update(second, second),
+        )
+
+        self.assertCountEqual(handled, [first, second])
+
+    async def test_member_removal_only_supersedes_its_guild(self) -> None:
+        first = member(self.first_guild, "first")
+        second = member(self.second_guild, "second")
+        payload = MagicMock(
+            spec=RawMemberRemoveEvent,
+            guild_id=1,
+            user=MagicMock(spec=User, id=5),
+        )
+
+        await gather(
+            on_member_update(first, first),
+            on_member_update(second, second),
+            on_raw_member_remove(payload),
+        )
+
+        self.assertEqual(handled, [second])
+
+    async def test_guild_removal_supersedes_everything_in_it(self) -> None:
+        first = member(self.first_guild, "first")
+        second = member(self.second_guild, "second")
+        role = MagicMock(spec=Role, id=3, guild=self.first_guild)
+
+        await gather(
+            on_member_update(first, first),
+            on_guild_role_update(role, role),
+            on_member_update(second, second),
+            on_guild_remove(self.first_guild),
+        )
+
+        self.assertEqual(handled, [second])
@@ -0,0 +1,61 @@
+from os import environ
+from datetime import datetime
+from datetime import timezone
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+environ.setdefault("DISCORD_TOKEN", "test")
+environ.setdefault("SPARQL_ENDPOINT", "http://localhost/sparql")
+
+from rdflib.term import URIRef  # noqa: E402
+
+from discord.guild import Guild  # noqa: E402
+from discord.utils import utcnow  # noqa: E402
+
+from graph.state import read_watermark  # noqa: E402
+from graph.state import write_watermark  # noqa: E402
+from graph.storage import RemoteGraph  # noqa: E402
+from updates.guild import synchronise_guild  # noqa: E402
+from tests.store import DatasetStore  # noqa: E402
+
+GUILD = URIRef("https://discord.com/guilds/1")
+WATERMARK = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+class SynchroniseGuildTest(IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.graph = RemoteGraph(DatasetStore(), GUILD)
+        self.guild = MagicMock(spec=Guild, id=1)
+        self.catch_up_guild = AsyncMock(return_value=None)
+        self.update_guild = AsyncMock(return_value=None)
+        for name, value in (
+            ("graph", AsyncMock(return_value=self.graph)),
+            ("catch_up_guild", self.catch_up_guild),
+            ("update_guild", self.update_guild),
+            ("send_notification", AsyncMock()),
+        ):
+            patcher = patch(f"updates.guild.{name}", value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def test_stored_watermark_catches_up_since_then(self) -> None:
+        await write_watermark(self.graph, WATERMARK)
+        # The stored watermarks only have a precision of seconds
+        start_time = utcnow().replace(microsecond=0)
+
+        await synchronise_guild(self.guild)
+
+        self.catch_up_guild.assert_awaited_once_with(self.guild, WATERMARK)
+        self.update_guild.assert_not_awaited()
+        self.assertGreaterEqual(await read_watermark(self.graph), start_time)
+
+    async def test_missing_watermark_validates_full_content(self) -> None:
+        start_time = utcnow().replace(microsecond=0)
+
+        await synchronise_guild(self.guild)
+
+        self.update_guild.assert_awaited_once_with(self.guild, validate_content=True)
+        self.catch_up_guild.assert_not_awaited()
+        self.assertGreaterEqual(await read_watermark(self.graph), start_time)
@@ -0,0 +1,67 @@
+from os import environ
+from unittest import IsolatedAsyncioTestCase
+
+environ.setdefault("DISCORD_TOKEN", "test")
+environ.setdefault("SPARQL_ENDPOINT", "http://localhost/sparql")
+
+from rdflib.term import URIRef  # noqa: E402
+from rdflib.term import Literal  # noqa: E402
+from rdflib.graph import Graph  # noqa: E402
+
+from graph.patch import patch  # noqa: E402
+from graph.patch import rdf_patch  # noqa: E402
+from graph.convert import fingerprint  # noqa: E402
+from graph.storage import RemoteGraph  # noqa: E402
+from graph.vocabulary import DISCORD  # noqa: E402
+
+GUILD = URIRef("https://discord.com/guilds/1")
+ROLE = URIRef("https://discord.com/guilds/1/2")
+EMOJI = URIRef("https://discord.com/guilds/1/3")
+EDITED = Literal("2024-01-01T00:00:00+00:00")
+
+
+def description(subject: URIRef, name: str) -> Graph:
+    graph = Graph(identifier=subject)
+    graph.add((subject, DISCORD.name, Literal(name)))
+    graph.add((subject, DISCORD.editedAt, EDITED))
+    return graph
+
+
+class PatchTest(IsolatedAsyncioTestCase):
+    async def test_missing_fingerprints_are_added_silently(self) -> None:
+        remote_graph = RemoteGraph(None, GUILD)
+        after = description(ROLE, "role")
+
+        graph_patch = await patch(remote_graph, description(ROLE, "role"), after)
+
+        self.assertIsNone(graph_patch)
+        self.assertEqual(
+            remote_graph.added,
+            {(ROLE, DISCORD.fingerprint, fingerprint(after, ROLE))},
+        )
+        self.assertFalse(remote_graph.deleted)
+
+    async def test_missing_fingerprints_are_left_out_of_patches(self) -> None:
+        remote_graph = RemoteGraph(None, GUILD)
+        before = description(ROLE, "role") + description(EMOJI, "emoji")
+        after = description(ROLE, "role") + description(EMOJI, "renamed")
+
+        graph_patch = await patch(remote_graph, before, after)
+
+        self.assertEqual((graph_patch.deleted, graph_patch.added), (2, 3))
+        self.assertEqual(
+            {triple for triple in remote_graph.added if triple[0] == ROLE},
+            {(ROLE, DISCORD.fingerprint, fingerprint(after, ROLE))},
+        )
+
+    async def test_rdf_patch_rows_stay_on_one_line(self) -> None:
+        content = Literal("first line\nsecond line")
+        deleted = {(ROLE, DISCORD.name, Literal("role"))}
+        added = {(ROLE, DISCORD.name, content)}
+
+        rows = (await rdf_patch(deleted, added)).splitlines()
+
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(
+            rows[2], f'A {ROLE.n3()} {DISCORD.name.n3()} "first line\\nsecond line" .'
+        )
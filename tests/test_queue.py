@@ -0,0 +1,36 @@
+from os import environ
+from asyncio import CancelledError
+from asyncio import wait_for
+from unittest import IsolatedAsyncioTestCase
+
+environ.setdefault("DISCORD_TOKEN", "test")
+environ.setdefault("SPARQL_ENDPOINT", "http://localhost/sparql")
+
+from updates.queue import GuildQueue  # noqa: E402
+from updates.queue import submit  # noqa: E402
+
+
+class GuildQueueTest(IsolatedAsyncioTestCase):
+    async def test_cancelled_work_releases_submitter(self) -> None:
+        queue = GuildQueue(1)
+
+        async def cancelled() -> None:
+            raise CancelledError()
+
+        async def completed() -> str:
+            return "done"
+
+        with self.assertRaises(CancelledError):
+            await wait_for(queue.submit(cancelled), timeout=1)
+
+        self.assertEqual(await wait_for(queue.submit(completed), timeout=1), "done")
+        self.assertIsNone(queue.worker)
+
+    async def test_nested_work_runs_directly(self) -> None:
+        async def inner() -> str:
+            return "inner"
+
+        async def outer() -> str:
+            return await submit(2, inner)
+
+        self.assertEqual(await wait_for(submit(2, outer), timeout=1), "inner")
@@ -0,0 +1,102 @@
+from os import environ
+from time import monotonic
+from asyncio import sleep
+from unittest import TestCase
+from unittest import IsolatedAsyncioTestCase
+
+environ.setdefault("DISCORD_TOKEN", "test")
+environ.setdefault("SPARQL_ENDPOINT", "http://localhost/sparql")
+
+from rdflib.term import URIRef  # noqa: E402
+from rdflib.term import Literal  # noqa: E402
+from rdflib.graph import Graph  # noqa: E402
+from rdflib.namespace import XSD  # noqa: E402
+
+from graph.storage import ntriples  # noqa: E402
+from graph.storage import RemoteGraph  # noqa: E402
+from graph.vocabulary import DISCORD  # noqa: E402
+from tests.store import DatasetStore  # noqa: E402
+
+
+class RecordingStore:
+    """Store that records when triples were written, instead of sending them."""
+
+    def __init__(self) -> None:
+        self.written_at = []
+
+    async def update(self, update: str) -> None:
+        self.written_at.append(monotonic())
+
+    async def insert(self, graph: URIRef, triples) -> None:
+        self.written_at.append(monotonic())
+
+
+class NTriplesTest(TestCase):
+    def test_multi_line_literals_round_trip(self) -> None:
+        subject = URIRef("https://discord.com/channels/1/2/3")
+        predicate = URIRef("https://discord.com/vocabulary/content")
+        triples = {
+            (subject, predicate, Literal('first line\nsecond "line"\r\n\\ end')),
+            (subject, predicate, Literal("multi\nline", lang="en")),
+            (subject, predicate, Literal("4\n2", datatype=XSD.string)),
+        }
+
+        serialized = ntriples(triples)
+        parsed = Graph().parse(data=serialized, format="nt")
+
+        self.assertEqual(len(serialized.splitlines()), len(triples))
+        self.assertEqual(set(parsed), triples)
+
+
+class CommitTest(IsolatedAsyncioTestCase):
+    async def test_shorter_delay_brings_write_forward(self) -> None:
+        store = RecordingStore()
+        remote_graph = RemoteGraph(store, URIRef("https://discord.com/guilds/1"))
+        subject = URIRef("https://discord.com/channels/1/2/3")
+        predicate = URIRef("https://discord.com/vocabulary/content")
+        start = monotonic()
+
+        remote_graph += [(subject, predicate, Literal("slow"))]
+        await remote_graph.commit(delay=2)
+        await sleep(0.05)
+        remote_graph += [(subject, predicate, Literal("fast"))]
+        await remote_graph.commit(delay=0.1)
+        remote_graph += [(subject, predicate, Literal("slow again"))]
+        await remote_graph.commit(delay=2)
+        await sleep(0.4)
+
+        self.assertEqual(len(store.written_at), 1)
+        self.assertLess(store.written_at[0] - start, 0.35)
+        self.assertFalse(remote_graph.pending())
+        self.assertIsNone(remote_graph.flush_task)
+
+
+class DeleteTest(IsolatedAsyncioTestCase):
+    async def test_descriptions_are_deleted_with_followed_objects(self) -> None:
+        store = DatasetStore()
+        remote_graph = RemoteGraph(store, URIRef("https://discord.com/guilds/1"))
+        message = URIRef("https://discord.com/channels/1/2/3")
+        attachment = URIRef("https://cdn.discordapp.com/attachments/2/4/file.txt")
+        kept = URIRef("https://discord.com/channels/1/2/5")
+        remote_graph += [
+            (message, DISCORD.content, Literal("deleted")),
+            (message, DISCORD.attachment, attachment),
+            (attachment, DISCORD.name, Literal("file.txt")),
+            (kept, DISCORD.content, Literal("kept")),
+        ]
+
+        count = await remote_graph.delete(message, follow=DISCORD.attachment)
+
+        self.assertEqual(count, 3)
+        self.assertEqual(
+            set(store.dataset.graph(remote_graph.identifier)),
+            {(kept, DISCORD.content, Literal("kept"))},
+        )
+
+    async def test_missing_subjects_are_not_deleted(self) -> None:
+        store = DatasetStore()
+        remote_graph = RemoteGraph(store, URIRef("https://discord.com/guilds/1"))
+        message = URIRef("https://discord.com/channels/1/2/3")
+
+        self.assertEqual(await remote_graph.delete(message), 0)
+        self.assertEqual(await remote_graph.delete(), 0)
@@ -1,33 +1,71 @@
+from typing import Set
+from typing import Dict
+from typing import List
 from typing import Optional
+from asyncio import Semaphore
+from logging import info
+from logging import debug
 from logging import warning
 
 from rdflib.term import URIRef
+from rdflib.term import Literal
+from rdflib.term import Variable
 from rdflib.graph import Graph
 
 from discord.abc import GuildChannel
-from discord.file import File
 from discord.errors import Forbidden
 from discord.threads import Thread
 from discord.channel import TextChannel
 from discord.channel import ForumChannel
+from discord.object import Object
+from discord.utils import time_snowflake
+from discord.utils import utcnow
+from discord.message import Message
 
+from client.config import CHANNEL_WINDOW
+from client.config import CHANNEL_VERIFY_LIMIT
+from client.config import CRAWLER_CHANNELS
 from graph.patch import patch
+from graph.patch import GraphPatch
+from graph.patch import merge_patches
 from graph.convert import uri
 from graph.convert import cbd
-from graph.utilities import copy
+from graph.convert import xsd_datetime
+from graph.convert import snowflake_datetime
+from graph.state import read_cursor
+from graph.state import write_cursor
+from graph.state import delete_cursor
+from graph.storage import RemoteGraph
+from graph.utilities import parse_snowflake
 from graph.vocabulary import DISCORD
+from updates.queue import ordered_per_graph
+
+# Shared by all guilds, so that concurrent guild updates do not multiply the limit
+_crawler_slots = Semaphore(CRAWLER_CHANNELS)
 
 
 async def update_channel(
-    graph: Graph,
+    graph: RemoteGraph,
     channel: GuildChannel | Thread,
-) -> Optional[File]:
-    """Updates the stored channel or thread."""
+    incremental: bool = False,
+) -> Optional[GraphPatch]:
+    """Updates the stored channel or thread, including its content."""
 
-    channel_uri = uri(channel)
+    return await merge_patches(
+        await update_channel_metadata(graph, channel),
+        await update_channel_content(graph, channel, incremental),
+    )
 
-    before = await collect_channel_graph(graph, channel_uri)
-    after = await collect_channel(channel)
+
+@ordered_per_graph
+async def update_channel_metadata(
+    graph: RemoteGraph,
+    channel: GuildChannel | Thread,
+) -> Optional[GraphPatch]:
+    """Updates the stored attributes of the channel or thread, without its content."""
+
+    after = cbd(channel).graph()
+    before = await graph.cbd(after.identifier)
 
     file = await patch(graph, before, after)
 
@@ -37,11 +75,31 @@ async def update_channel(
     return file
 
 
-async def delete_channel(graph: Graph, channel_uri: URIRef) -> Optional[File]:
-    """Deletes the stored channel."""
+async def update_channel_content(
+    graph: RemoteGraph,
+    channel: GuildChannel | Thread,
+    incremental: bool = False,
+) -> Optional[GraphPatch]:
+    """
+    Updates the stored messages, attachments and threads of the channel or thread.
+    The incremental mode only considers the messages past the stored high-water mark
+    and the newest stored ones, instead of the full channel history.
+    """
+
+    if incremental and isinstance(channel, (TextChannel, Thread)):
+        return await patch_channel_changes(graph, channel)
+
+    return await stream_channel_content(graph, channel)
+
+
+@ordered_per_graph
+async def delete_channel(
+    graph: RemoteGraph, *channel_uris: URIRef
+) -> Optional[GraphPatch]:
+    """Deletes the stored channels."""
 
     after = Graph()
-    before = await collect_channel_graph(graph, channel_uri)
+    before = await collect_channel_graph(graph, *channel_uris)
 
     file = await patch(graph, before, after)
 
@@ -51,70 +109,365 @@ async def delete_channel(graph: Graph, channel_uri: URIRef) -> Optional[File]:
     return file
 
 
-async def collect_channel(channel: GuildChannel | Thread) -> Graph:
+async def crawl_channel(
+    graph: RemoteGraph,
+    channel: GuildChannel | Thread,
+    incremental: bool = False,
+) -> Optional[GraphPatch]:
     """
-    Collects the full channel description from the Discord API,
-    including messages, attachments and threads for the relevant channel types.
+    Updates the channel content, waiting for a free crawler slot first.
+    Each channel and its threads are crawled by a single task, so concurrent crawls
+    always target different channel rate limit buckets of the Discord API.
     """
 
-    content = cbd(channel)
+    async with _crawler_slots:
+        return await update_channel_content(graph, channel, incremental)
 
-    try:
-        if isinstance(channel, (TextChannel, Thread)):
-            async for message in channel.history(limit=None, oldest_first=True):
-                content += cbd(message)
-                for attachment in message.attachments:
-                    content += cbd(attachment)
+
+async def stream_channel_content(
+    graph: RemoteGraph,
+    channel: GuildChannel | Thread,
+) -> Optional[GraphPatch]:
+    """Synchronises the stored content of the channel with the Discord API."""
+
+    channel_uri = uri(channel)
+    thread_uris = set()
+    graph_patch = None
+    start_id = 0
+    # Messages and threads created by the events after the crawl started are kept
+    upper_id = time_snowflake(utcnow(), high=True)
+    complete = True
+
+    if isinstance(channel, (TextChannel, Thread)):
+        cursor = await read_cursor(graph, channel_uri)
+        if cursor:
+            start_id = await parse_snowflake(cursor)
+            info(f"Resuming crawl of <{channel_uri}> after <{cursor}>")
+        messages = []
+        lower_id = start_id
+        try:
+            async for message in channel.history(
+                limit=None,
+                after=Object(id=start_id) if start_id else None,
+                before=Object(id=upper_id),
+                oldest_first=True,
+            ):
+                messages.append(message)
                 if message.thread:
-                    content += await collect_channel(message.thread)
+                    thread_uris.add(uri(message.thread))
+                    graph_patch = await merge_patches(
+                        graph_patch,
+                        await update_channel(graph, message.thread),
+                    )
+                # Each window is patched against the same slice of stored messages
+                # and checkpointed, so memory stays bounded and crawls can resume
+                if len(messages) >= CHANNEL_WINDOW:
+                    graph_patch = await merge_patches(
+                        graph_patch,
+                        await patch_messages(
+                            graph,
+                            channel_uri,
+                            messages,
+                            lower_id,
+                            message.id,
+                        ),
+                    )
+                    await write_cursor(graph, channel_uri, uri(message))
+                    lower_id = message.id
+                    messages = []
+        except Forbidden:
+            warning(f"Missing permissions for content in <{channel_uri}>")
+            complete = False
+        if complete:
+            # The last window also covers stored messages the history did not return
+            graph_patch = await merge_patches(
+                graph_patch,
+                await patch_messages(graph, channel_uri, messages, lower_id, upper_id),
+            )
+            if lower_id:
+                await delete_cursor(graph, channel_uri)
+        elif messages:
+            # Stored messages past the interruption were not seen, so they are kept
+            graph_patch = await merge_patches(
+                graph_patch,
+                await patch_messages(
+                    graph,
+                    channel_uri,
+                    messages,
+                    lower_id,
+                    messages[-1].id,
+                ),
+            )
+            await write_cursor(graph, channel_uri, uri(messages[-1]))
 
-        elif isinstance(channel, ForumChannel):
-            for thread in channel.threads:
-                content += await collect_channel(thread)
+    elif isinstance(channel, ForumChannel):
+        for thread in channel.threads:
+            thread_uris.add(uri(thread))
+            graph_patch = await merge_patches(
+                graph_patch,
+                await update_channel(graph, thread),
+            )
 
-    except Forbidden:
-        warning(f"Missing permissions for content in <{uri(channel)}>")
+    if not complete:
+        return graph_patch
 
-    return content
+    stale_thread_uris = set()
+
+    # Threads started from messages before a resumed crawl were not revisited
+    for thread_uri in await collect_stored_threads(graph, channel_uri):
+        if (
+            thread_uri not in thread_uris
+            and start_id < await parse_snowflake(thread_uri) < upper_id
+        ):
+            stale_thread_uris.add(thread_uri)
+
+    if stale_thread_uris:
+        graph_patch = await merge_patches(
+            graph_patch,
+            await delete_channel(graph, *stale_thread_uris),
+        )
+
+    return graph_patch
 
 
-async def collect_channel_graph(graph: Graph, channel_uri: URIRef) -> Graph:
+@ordered_per_graph
+async def patch_messages(
+    graph: RemoteGraph,
+    channel_uri: URIRef,
+    messages: List[Message],
+    lower_id: int,
+    upper_id: Optional[int] = None,
+) -> Optional[GraphPatch]:
     """
-    Collects the full stored channel graph from the database,
-    including messages, attachments and threads for the channels that can have them.
+    Patches the stored messages of a channel with IDs after the lower bound and up
+    to the upper bound, including their attachments, to the provided messages.
+    """
+
+    after = Graph()
+
+    for message in messages:
+        after += cbd(message)
+        for attachment in message.attachments:
+            after += cbd(attachment)
+
+    message_uris = await collect_stored_messages(graph, channel_uri, lower_id, upper_id)
+    before = await graph.cbd(*message_uris, follow=DISCORD.attachment)
+
+    file = await patch(graph, before, after) if before or after else None
+
+    after.close()
+    before.close()
+
+    return file
+
+
+async def patch_channel_changes(
+    graph: RemoteGraph,
+    channel: TextChannel | Thread,
+) -> Optional[GraphPatch]:
+    """
+    Patches the messages of the channel that changed since the newest stored ones,
+    without a full history crawl. The newest stored messages are verified by their
+    edit timestamps, so only the edited, deleted and new messages have their
+    descriptions fetched and compared, one window of changed messages at a time.
+    An interrupted full crawl of the channel is resumed instead.
     """
 
-    # Local copy is needed for performance reasons
-    local_graph = await copy(graph)
+    channel_uri = uri(channel)
+
+    # An interrupted full crawl has to finish before the history can be trusted
+    if await read_cursor(graph, channel_uri):
+        return await stream_channel_content(graph, channel)
+
+    stored_edits = await collect_stored_edits(graph, channel_uri)
 
-    content = Graph()
+    if not stored_edits:
+        debug(f"No stored messages for incremental update of <{channel_uri}>")
+        return await stream_channel_content(graph, channel)
 
-    stored_channel_uris = set(
-        (
-            channel_uri,
-            *local_graph.subjects(
-                predicate=DISCORD.parent,
-                object=channel_uri,
-                unique=True,
-            ),
+    stored_ids = [await parse_snowflake(message_uri) for message_uri in stored_edits]
+    oldest_id = min(stored_ids)
+
+    messages = []
+    changed = 0
+    graph_patch = None
+
+    try:
+        async for message in channel.history(
+            limit=None,
+            after=Object(id=oldest_id - 1),
+            oldest_first=True,
+        ):
+            stored_edit = stored_edits.pop(uri(message), None)
+            message_edit = xsd_datetime(message.edited_at or message.created_at)
+            if stored_edit is not None and stored_edit.eq(message_edit):
+                continue
+            messages.append(message)
+            if message.thread and stored_edit is None:
+                graph_patch = await merge_patches(
+                    graph_patch,
+                    await update_channel(graph, message.thread),
+                )
+            if len(messages) >= CHANNEL_WINDOW:
+                changed += len(messages)
+                graph_patch = await merge_patches(
+                    graph_patch,
+                    await patch_changed_messages(graph, messages),
+                )
+                messages = []
+
+    except Forbidden:
+        warning(f"Missing permissions for content in <{channel_uri}>")
+        return await merge_patches(
+            graph_patch,
+            await stream_channel_content(graph, channel),
         )
+
+    # The verified messages that were not returned by the API have been deleted
+    changed += len(messages) + len(stored_edits)
+
+    debug(f"Incremental update of <{channel_uri}> with {changed} messages")
+
+    return await merge_patches(
+        graph_patch,
+        await patch_changed_messages(graph, messages, *stored_edits),
     )
 
-    for stored_channel_uri in stored_channel_uris:
-        content += local_graph.cbd(stored_channel_uri)
-        for message_uri in local_graph.subjects(
-            predicate=DISCORD.channel,
-            object=stored_channel_uri,
-            unique=True,
-        ):
-            content += local_graph.cbd(message_uri)
-            for attachment_uri in local_graph.objects(
-                subject=message_uri,
-                predicate=DISCORD.attachment,
-                unique=True,
-            ):
-                content += local_graph.cbd(attachment_uri)
 
-    local_graph.close()
+@ordered_per_graph
+async def patch_changed_messages(
+    graph: RemoteGraph,
+    messages: List[Message],
+    *deleted_uris: URIRef,
+) -> Optional[GraphPatch]:
+    """
+    Patches the stored messages and their attachments to the provided messages,
+    and deletes the stored messages that are no longer present.
+    """
+
+    after = Graph()
+
+    for message in messages:
+        after += cbd(message)
+        for attachment in message.attachments:
+            after += cbd(attachment)
+
+    message_uris = (*(uri(message) for message in messages), *deleted_uris)
+    before = await graph.cbd(*message_uris, follow=DISCORD.attachment)
+
+    file = await patch(graph, before, after) if before or after else None
+
+    after.close()
+    before.close()
+
+    return file
+
+
+async def collect_stored_edits(
+    graph: RemoteGraph,
+    channel_uri: URIRef,
+) -> Dict[URIRef, Literal]:
+    """Collects the edit timestamps of the newest stored messages in a channel."""
+
+    variable_message = Variable("message")
+    variable_edited = Variable("edited")
+
+    result = await graph.query(f"""
+            SELECT ?message ?edited WHERE {{
+                ?message <{DISCORD.channel}> <{channel_uri}> ;
+                    <{DISCORD.createdAt}> ?created ;
+                    <{DISCORD.editedAt}> ?edited .
+            }}
+            ORDER BY DESC(?created)
+            LIMIT {CHANNEL_VERIFY_LIMIT}
+        """)
+
+    stored_edits = {
+        bindings[variable_message]: bindings[variable_edited]
+        for bindings in result.bindings
+    }
+
+    return stored_edits
+
+
+async def collect_stored_messages(
+    graph: RemoteGraph,
+    channel_uri: URIRef,
+    lower_id: int,
+    upper_id: Optional[int] = None,
+) -> Set[URIRef]:
+    """
+    Collects the URIs of the stored messages in a channel with IDs after the lower
+    bound and up to the upper bound. The stored creation dates only have a precision
+    of seconds, so the final comparison is done on the IDs in the message URIs.
+    """
+
+    variable_message = Variable("message")
+
+    filters = []
+
+    if lower_id:
+        lower_date = xsd_datetime(snowflake_datetime(lower_id))
+        filters.append(f"?created >= {lower_date.n3()}")
+
+    if upper_id:
+        upper_date = xsd_datetime(snowflake_datetime(upper_id))
+        filters.append(f"?created <= {upper_date.n3()}")
+
+    filters_string = f"FILTER ( {' && '.join(filters)} )" if filters else ""
+
+    result = await graph.query(f"""
+            SELECT ?message WHERE {{
+                ?message <{DISCORD.channel}> <{channel_uri}> ;
+                    <{DISCORD.createdAt}> ?created .
+                {filters_string}
+            }}
+        """)
+
+    message_uris = set()
+
+    for bindings in result.bindings:
+        message_uri = bindings[variable_message]
+        message_id = await parse_snowflake(message_uri)
+        if message_id > lower_id and (not upper_id or message_id <= upper_id):
+            message_uris.add(message_uri)
+
+    return message_uris
+
+
+async def collect_stored_threads(
+    graph: RemoteGraph,
+    channel_uri: URIRef,
+) -> Set[URIRef]:
+    """Collects the URIs of the stored threads of a channel."""
+
+    variable_thread = Variable("thread")
+
+    result = await graph.query(
+        f"SELECT ?thread WHERE {{ ?thread <{DISCORD.parent}> <{channel_uri}> }}"
+    )
+
+    return set(bindings[variable_thread] for bindings in result.bindings)
+
+
+async def collect_channel_graph(graph: RemoteGraph, *channel_uris: URIRef) -> Graph:
+    """
+    Collects the full stored channel graphs from the database in one request,
+    including messages, attachments and threads for the channels that can have them.
+    """
+
+    if not channel_uris:
+        return Graph()
+
+    values = " ".join(channel_uri.n3() for channel_uri in channel_uris)
+
+    content = await graph.describe(
+        f"""
+            VALUES ?parent {{ {values} }}
+            ?channel <{DISCORD.parent}>? ?parent .
+            ?subject <{DISCORD.channel}>? ?channel .
+        """,
+        follow=DISCORD.attachment,
+    )
 
     return content
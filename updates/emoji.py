@@ -1,39 +1,35 @@
 from typing import Iterable
+from typing import Optional
+from logging import debug
 
 from rdflib.graph import Graph
-from rdflib.namespace import RDF
 
-from discord.file import File
 from discord.emoji import Emoji
 
 from graph.patch import patch
+from graph.patch import GraphPatch
 from graph.convert import cbd
+from graph.storage import RemoteGraph
 from graph.vocabulary import DISCORD
+from updates.shared import unchanged
 
 
-async def update_emojis(graph: Graph, emojis: Iterable[Emoji]) -> File:
+async def update_emojis(
+    graph: RemoteGraph,
+    emojis: Iterable[Emoji],
+) -> Optional[GraphPatch]:
     """Updates the stored emojis."""
 
-    before = Graph()
     after = Graph()
 
-    emoji_uris = set(
-        graph.subjects(
-            predicate=RDF.type,
-            object=DISCORD.Emoji,
-            unique=True,
-        )
-    )
-
     for emoji in emojis:
-        emoji_cbd = cbd(emoji)
-        after += emoji_cbd
-        before += graph.cbd(emoji_cbd.identifier)
-        if emoji_cbd.identifier in emoji_uris:
-            emoji_uris.remove(emoji_cbd.identifier)
-
-    for emoji_uri in emoji_uris:
-        before += graph.cbd(emoji_uri)
+        after += cbd(emoji)
+
+    if await unchanged(graph, after, DISCORD.Emoji):
+        debug(f"Skip unmodified emojis in <{graph.identifier}>")
+        return None
+
+    before = await graph.instances(DISCORD.Emoji)
 
     file = await patch(graph, before, after)
 
@@ -1,6 +1,11 @@
 from typing import Set
+from typing import List
+from typing import Tuple
 from typing import Optional
 from typing import Iterable
+from datetime import datetime
+from asyncio import Semaphore
+from asyncio import gather
 from logging import info
 from logging import debug
 from logging import warning
@@ -10,96 +15,242 @@ from rdflib.term import Variable
 from rdflib.graph import Graph
 from rdflib.namespace import RDF
 
-from discord.file import File
+from discord.abc import GuildChannel
 from discord.guild import Guild
 from discord.utils import utcnow
+from discord.threads import Thread
+from discord.channel import TextChannel
 
+from client.config import CRAWLER_GUILDS
 from graph.patch import patch
+from graph.patch import GraphPatch
+from graph.patch import merge_patches
 from graph.convert import uri
 from graph.convert import cbd
+from graph.convert import snowflake_datetime
+from graph.state import read_watermark
+from graph.state import write_watermark
 from graph.storage import graph
-from graph.storage import dataset
-from graph.utilities import copy
+from graph.storage import store
+from graph.storage import RemoteGraph
 from graph.vocabulary import DISCORD
-from updates.channel import collect_channel
+from updates.channel import crawl_channel
 from updates.channel import collect_channel_graph
+from updates.queue import ordered_per_graph
 from updates.utilities import send_notification
 
+_guild_slots = Semaphore(CRAWLER_GUILDS)
+
+# Guilds whose stored state is kept up to date by the events as they happen
+_live_guild_uris: Set[URIRef] = set()
+_suspended_guild_uris: Set[URIRef] = set()
 
-async def update_guild(guild: Guild, validate_content: bool = False) -> Optional[File]:
-    """Updates the stored guild."""
 
-    after = cbd(guild)
-    guild_graph = await graph(after.identifier)
+async def update_guild(
+    guild: Guild,
+    validate_content: bool = False,
+) -> Optional[GraphPatch]:
+    """Updates the stored guild."""
 
     if validate_content:
-        info(f"Updating content for guild <{after.identifier}>")
+        info(f"Updating content for guild <{uri(guild)}>")
+        return await update_guild_content(guild)
 
-        before = await copy(guild_graph)
+    guild_uri = uri(guild)
+    guild_graph = await graph(guild_uri)
 
-        for role in guild.roles:
-            after += cbd(role)
+    after = cbd(guild).graph()
+    before = await guild_graph.cbd(guild_uri)
 
-        for member in guild.members:
-            after += cbd(member)
+    file = await patch(guild_graph, before, after)
 
-        for emoji in guild.emojis:
-            after += cbd(emoji)
+    await guild_graph.commit()
 
-        for sticker in guild.stickers:
-            after += cbd(sticker)
+    after.close()
+    before.close()
 
-        for event in guild.scheduled_events:
-            after += cbd(event)
+    return file
 
-        for channel in guild.channels:
-            if channel.id != guild.public_updates_channel.id:
-                after += await collect_channel(channel)
 
-    else:
-        before = guild_graph.cbd(after.identifier)
+async def catch_up_guild(guild: Guild, since: datetime) -> Optional[GraphPatch]:
+    """
+    Updates the stored guild for the changes made since the given time.
+    The cached guild entities are compared against the stored ones, while message
+    histories are only crawled incrementally for the channels and threads that have
+    received messages since, instead of validating the full guild content.
+    """
 
-    file = await patch(guild_graph, before, after)
+    info(f"Catching up on guild <{uri(guild)}> since {since.isoformat()}")
 
-    guild_graph.commit()
-    guild_graph.close()
+    return await update_guild_content(guild, since)
 
-    after.close()
-    before.close()
 
-    return file
+async def update_guild_content(
+    guild: Guild,
+    since: Optional[datetime] = None,
+    entities: bool = True,
+) -> Optional[GraphPatch]:
+    """
+    Updates the stored channels of the guild and their content, and optionally the
+    other cached guild entities. The entities and channel attributes are patched
+    first, after which the channel contents are streamed by the crawler one channel
+    at a time. When a time is given, only the channels and threads with messages
+    since then are crawled, and only incrementally.
+    """
 
+    guild_graph = await graph(uri(guild))
 
-async def delete_guild(guild_uri: URIRef) -> None:
-    """Deletes the stored guild."""
+    file, crawled_channels = await patch_guild_structure(
+        guild_graph,
+        guild,
+        since,
+        entities,
+    )
 
-    warning(f"Removing guild graph <{guild_uri}>")
+    files = await gather(
+        *(
+            crawl_channel(guild_graph, channel, incremental)
+            for channel, incremental in crawled_channels
+        )
+    )
 
-    default_dataset = await dataset()
+    await guild_graph.commit()
+
+    return await merge_patches(file, *files)
+
+
+@ordered_per_graph
+async def patch_guild_structure(
+    guild_graph: RemoteGraph,
+    guild: Guild,
+    since: Optional[datetime],
+    entities: bool,
+) -> Tuple[Optional[GraphPatch], List[Tuple[GuildChannel | Thread, bool]]]:
+    """
+    Patches the stored channels and optionally the other cached guild entities,
+    returning the channels and threads whose content should be crawled, and
+    whether only incrementally.
+    """
+
+    entity_types = (
+        (
+            DISCORD.Guild,
+            DISCORD.Role,
+            DISCORD.User,
+            DISCORD.Emoji,
+            DISCORD.GuildSticker,
+            DISCORD.ScheduledEvent,
+        )
+        if entities
+        else ()
+    )
 
-    default_dataset.update(
-        f"""
-            DELETE WHERE {{
-                GRAPH <{guild_uri}> {{
-                    ?s ?p ?o
-                }}
-            }}
-        """
+    values = " ".join(
+        entity_type.n3() for entity_type in (*entity_types, DISCORD.Channel)
     )
 
-    result = default_dataset.query(
+    before = await guild_graph.describe(
         f"""
-            ASK WHERE {{
-                GRAPH <{guild_uri}> {{
-                    ?s ?p ?o
-                }}
-            }}
+            VALUES ?type {{ {values} }}
+            ?subject <{RDF.type}> ?type .
         """
     )
+    after = await collect_guild(guild) if entities else Graph()
 
-    assert not result.askAnswer, "Removal of guild graph failed"
+    removed_channel_uris = set(
+        before.subjects(predicate=RDF.type, object=DISCORD.Channel, unique=True)
+    )
+    crawled_channels = []
 
-    default_dataset.commit()
+    for channel in guild.channels:
+        channel_uri = uri(channel)
+        if (
+            guild.public_updates_channel
+            and channel.id == guild.public_updates_channel.id
+        ):
+            debug(f"Skip updates channel <{channel_uri}>")
+            continue
+        after += cbd(channel)
+        if channel_uri not in removed_channel_uris:
+            debug(f"Found new <{channel_uri}>")
+            crawled_channels.append((channel, False))
+        else:
+            removed_channel_uris.remove(channel_uri)
+            if not since:
+                crawled_channels.append((channel, False))
+            elif await has_messages_since(channel, since):
+                debug(f"Catch up on messages in <{channel_uri}>")
+                crawled_channels.append((channel, True))
+
+    # Threads without new messages are left to their own update events
+    if since:
+        thread_uris = set()
+        for thread in guild.threads:
+            if (
+                not guild.public_updates_channel
+                or thread.parent_id != guild.public_updates_channel.id
+            ) and await has_messages_since(thread, since):
+                debug(f"Catch up on messages in <{uri(thread)}>")
+                thread_uris.add(uri(thread))
+                after += cbd(thread)
+                crawled_channels.append((thread, True))
+        before += await guild_graph.cbd(*thread_uris)
+
+    for channel_uri in removed_channel_uris:
+        debug(f"Remove previously seen <{channel_uri}>")
+
+    before += await collect_channel_graph(guild_graph, *removed_channel_uris)
+
+    file = await patch(guild_graph, before, after)
+
+    after.close()
+    before.close()
+
+    return file, crawled_channels
+
+
+async def has_messages_since(channel: GuildChannel | Thread, since: datetime) -> bool:
+    """Checks whether the channel or thread has received messages since a time."""
+    return (
+        isinstance(channel, (TextChannel, Thread))
+        and channel.last_message_id is not None
+        and snowflake_datetime(channel.last_message_id) > since
+    )
+
+
+async def collect_guild(guild: Guild) -> Graph:
+    """Collects the descriptions of the guild and its cached entities."""
+
+    content = cbd(guild).graph()
+
+    for role in guild.roles:
+        content += cbd(role)
+
+    for member in guild.members:
+        content += cbd(member)
+
+    for emoji in guild.emojis:
+        content += cbd(emoji)
+
+    for sticker in guild.stickers:
+        content += cbd(sticker)
+
+    for event in guild.scheduled_events:
+        content += cbd(event)
+
+    return content
+
+
+async def delete_guild(guild_uri: URIRef) -> None:
+    """Deletes the stored guild."""
+
+    warning(f"Removing guild graph <{guild_uri}>")
+
+    _live_guild_uris.discard(guild_uri)
+    _suspended_guild_uris.discard(guild_uri)
+
+    # Buffered modifications are discarded, so they cannot resurrect the graph
+    await (await graph(guild_uri)).drop()
 
 
 async def synchronise_guilds(guilds: Iterable[Guild]) -> None:
@@ -109,11 +260,20 @@ async def synchronise_guilds(guilds: Iterable[Guild]) -> None:
 
     info("Synchronising all guilds with Discord state")
 
+    _live_guild_uris.clear()
+    _suspended_guild_uris.clear()
+
     guild_uris = await stored_guild_uris()
 
+    # Smaller guilds are queued for the crawler first, so they go live sooner
+    guilds = sorted(
+        guilds,
+        key=lambda guild: (len(guild.channels), guild.member_count or 0),
+    )
+
+    await gather(*(synchronise_guild(guild) for guild in guilds))
+
     for guild in guilds:
-        file = await update_guild(guild, validate_content=True)
-        await send_notification(guild, file)
         guild_uri = uri(guild)
         if guild_uri in guild_uris:
             guild_uris.remove(guild_uri)
@@ -128,69 +288,67 @@ async def synchronise_guilds(guilds: Iterable[Guild]) -> None:
     )
 
 
-async def refresh_channels(guild: Guild) -> Optional[File]:
-    """Refresh channel after permission update, if deemed relevant."""
+async def synchronise_guild(guild: Guild) -> None:
+    """
+    Synchronises the stored guild, waiting for a free guild slot first.
+    Guilds with a stored watermark only catch up on the changes since then,
+    while the others have their full content validated. The synchronisation is
+    not queued as a whole, as it would hold up the events of the guild for the
+    entire crawl, but every patch it applies waits its turn in the event queue.
+    """
+
+    # The slot is taken first, so guilds start in the order they were queued in
+    async with _guild_slots:
+        start_time = utcnow()
+        guild_graph = await graph(uri(guild))
+        watermark = await read_watermark(guild_graph)
+        if watermark:
+            file = await catch_up_guild(guild, watermark)
+        else:
+            file = await update_guild(guild, validate_content=True)
 
-    guild_uri = uri(guild)
+    # The events received during synchronisation have been handled as they happened
+    await write_watermark(guild_graph, start_time)
+    _live_guild_uris.add(guild_graph.identifier)
 
-    info(f"Refreshing channels in <{guild_uri}>")
+    await send_notification(guild, file)
 
-    guild_graph = await graph(guild_uri)
-    guild_graph_copy = await copy(guild_graph)
 
-    channel_uris = set(
-        guild_graph_copy.subjects(
-            predicate=RDF.type,
-            object=DISCORD.Channel,
-            unique=True,
-        )
-    )
+async def suspend_guilds() -> None:
+    """Stores the current time as the watermark of the guilds kept up to date."""
 
-    graph_before = Graph()
-    graph_after = Graph()
+    disconnect_time = utcnow()
 
-    for channel in guild.channels:
-        channel_uri = uri(channel)
-        if (
-            guild.public_updates_channel
-            and channel.id == guild.public_updates_channel.id
-        ):
-            debug(f"Skip updates channel <{channel_uri}>")
-        else:
-            if channel_uri in channel_uris:
-                channel_uris.remove(channel_uri)
-                debug(f"Update existing <{channel_uri}>")
-                graph_before += await collect_channel_graph(
-                    guild_graph_copy,
-                    channel_uri,
-                )
-            else:
-                debug(f"Found new <{channel_uri}>")
-            graph_after += await collect_channel(channel)
-
-    for channel_uri in channel_uris:
-        debug(f"Remove previously seen <{channel_uri}>")
-        graph_before += await collect_channel_graph(guild_graph_copy, channel_uri)
+    for guild_uri in _live_guild_uris:
+        await write_watermark(await graph(guild_uri), disconnect_time)
 
-    file = await patch(guild_graph, graph_before, graph_after)
+    _suspended_guild_uris.update(_live_guild_uris)
+    _live_guild_uris.clear()
 
-    guild_graph.commit()
-    guild_graph.close()
 
-    graph_before.close()
-    graph_after.close()
+async def resume_guilds() -> None:
+    """Marks the guilds as kept up to date again after the session was resumed."""
 
-    return file
+    _live_guild_uris.update(_suspended_guild_uris)
+    _suspended_guild_uris.clear()
+
+
+async def refresh_channels(guild: Guild) -> Optional[GraphPatch]:
+    """Refresh channel after permission update, if deemed relevant."""
+
+    info(f"Refreshing channels in <{uri(guild)}>")
+
+    return await update_guild_content(guild, entities=False)
 
 
 async def stored_guild_uris() -> Set[URIRef]:
     """Collect the URIs of all guilds currently stored."""
 
-    default_dataset = await dataset()
+    remote_store = await store()
 
     variable_g = Variable("g")
 
-    result = default_dataset.query("SELECT DISTINCT ?g WHERE { GRAPH ?g { } }")
+    result = await remote_store.query("SELECT DISTINCT ?g WHERE { GRAPH ?g { } }")
 
     guild_uris = set(bindings[variable_g] for bindings in result.bindings)
 
@@ -1,52 +1,54 @@
 from typing import Iterable
+from typing import Optional
+from logging import debug
 
 from rdflib.term import URIRef
-from rdflib.graph import Graph
 
-from discord.file import File
 from discord.message import Message
 
 from graph.patch import patch
+from graph.patch import insert
+from graph.patch import remove
+from graph.patch import GraphPatch
 from graph.convert import cbd
+from graph.storage import RemoteGraph
+from updates.shared import unchanged
 from graph.vocabulary import DISCORD
 
 
-async def update_message(graph: Graph, message: Message) -> File:
-    """Updates the stored message and its attachments to the provided one."""
-
-    after = cbd(message)
-    before = graph.cbd(after.identifier)
+async def create_message(graph: RemoteGraph, message: Message) -> GraphPatch:
+    """Stores a new message and its attachments, without looking up stored data."""
 
-    attachment_uris = set(before.objects(predicate=DISCORD.attachment, unique=True))
+    after = cbd(message).graph()
 
     for attachment in message.attachments:
-        attachment_cbd = cbd(attachment)
-        after += attachment_cbd
-        before += graph.cbd(attachment_cbd.identifier)
-        if attachment_cbd.identifier in attachment_uris:
-            attachment_uris.remove(attachment_cbd.identifier)
+        after += cbd(attachment)
 
-    for attachment_uri in attachment_uris:
-        before += graph.cbd(attachment_uri)
-
-    file = await patch(graph, before, after)
+    file = await insert(graph, after)
 
     after.close()
-    before.close()
 
     return file
 
 
-async def delete_message(graph: Graph, message_uri: URIRef) -> File:
-    """Deletes the stored message and its attachments."""
+async def update_message(graph: RemoteGraph, message: Message) -> Optional[GraphPatch]:
+    """Updates the stored message and its attachments to the provided one."""
 
-    after = Graph()
-    before = graph.cbd(message_uri)
+    after = cbd(message).graph()
+
+    for attachment in message.attachments:
+        after += cbd(attachment)
 
-    attachment_uris = set(before.objects(predicate=DISCORD.attachment, unique=True))
+    if await unchanged(graph, after):
+        debug(f"Skip unmodified <{after.identifier}>")
+        return None
 
-    for attachment_uri in attachment_uris:
-        before += graph.cbd(attachment_uri)
+    # The stored attachments are collected through the stored message
+    before = await graph.cbd(
+        after.identifier,
+        *after.objects(predicate=DISCORD.attachment, unique=True),
+        follow=DISCORD.attachment,
+    )
 
     file = await patch(graph, before, after)
 
@@ -56,21 +58,19 @@ async def delete_message(graph: Graph, message_uri: URIRef) -> File:
     return file
 
 
-async def bulk_delete_messages(graph: Graph, message_uris: Iterable[URIRef]) -> File:
-    """Deletes all stored messages and their attachments."""
-
-    after = Graph()
-    before = Graph()
-
-    for message_uri in message_uris:
-        before += graph.cbd(message_uri)
+async def delete_message(
+    graph: RemoteGraph,
+    message_uri: URIRef,
+) -> Optional[GraphPatch]:
+    """Deletes the stored message and its attachments."""
 
-    for attachment_uri in before.objects(predicate=DISCORD.attachment, unique=True):
-        before += graph.cbd(attachment_uri)
+    return await remove(graph, message_uri, follow=DISCORD.attachment)
 
-    file = await patch(graph, before, after)
 
-    after.close()
-    before.close()
+async def bulk_delete_messages(
+    graph: RemoteGraph,
+    message_uris: Iterable[URIRef],
+) -> Optional[GraphPatch]:
+    """Deletes all stored messages and their attachments."""
 
-    return file
+    return await remove(graph, *message_uris, follow=DISCORD.attachment)
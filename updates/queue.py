@@ -0,0 +1,136 @@
+from time import monotonic
+from typing import Any
+from typing import Dict
+from typing import Tuple
+from typing import Callable
+from typing import Optional
+from typing import Coroutine
+from typing import Awaitable
+from asyncio import Queue
+from asyncio import Task
+from asyncio import Future
+from asyncio import CancelledError
+from asyncio import create_task
+from asyncio import current_task
+from asyncio import get_running_loop
+from functools import wraps
+from functools import partial
+from contextvars import ContextVar
+from logging import info
+from logging import debug
+
+from client.config import EVENT_QUEUE_SIZE
+from graph.storage import RemoteGraph
+from graph.utilities import parse_snowflake
+
+Work = Callable[[], Awaitable[Any]]
+
+# The guild whose queued work is being run by the current task and its subtasks
+_running_guild: ContextVar[Optional[int]] = ContextVar("running_guild", default=None)
+
+
+class GuildQueue:
+    """
+    Ordered work queue of one guild, processed by a single worker task that only
+    runs while there is work queued. Submitting to a full queue waits for a free
+    slot, which is recorded as backpressure.
+    """
+
+    def __init__(self, guild_id: int) -> None:
+        self.guild_id = guild_id
+        self.queue: Queue[Tuple[Work, Future]] = Queue(maxsize=EVENT_QUEUE_SIZE)
+        self.worker: Optional[Task] = None
+        self.processed = 0
+        self.max_depth = 0
+        self.blocked = 0
+        self.blocked_seconds = 0.0
+
+    async def submit(self, work: Work) -> Any:
+        """Runs the work after the work submitted before it, returning its result."""
+        future = get_running_loop().create_future()
+        if self.queue.full():
+            self.blocked += 1
+            debug(f"Event queue of guild {self.guild_id} is full, waiting")
+            wait_start = monotonic()
+            await self.queue.put((work, future))
+            self.blocked_seconds += monotonic() - wait_start
+        else:
+            self.queue.put_nowait((work, future))
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+        if not self.worker:
+            self.worker = create_task(self.work())
+        return await future
+
+    async def work(self) -> None:
+        """Processes the queued work in order, until the queue is empty."""
+        _running_guild.set(self.guild_id)
+        try:
+            while not self.queue.empty():
+                work, future = self.queue.get_nowait()
+                try:
+                    result = await work()
+                except CancelledError:
+                    future.cancel()
+                    # Only the work was cancelled, unless the worker itself is
+                    if current_task().cancelling():
+                        raise
+                except Exception as ex:
+                    if not future.done():
+                        future.set_exception(ex)
+                else:
+                    if not future.done():
+                        future.set_result(result)
+                self.processed += 1
+        except CancelledError:
+            # Nothing is left to run the queued work, so its submitters stop waiting
+            while not self.queue.empty():
+                _, future = self.queue.get_nowait()
+                future.cancel()
+            raise
+        finally:
+            self.worker = None
+        if self.blocked:
+            info(
+                "Drained event queue of guild {} ({} processed, {} max depth, "
+                "{} waits for {:.2f} seconds)".format(
+                    self.guild_id,
+                    self.processed,
+                    self.max_depth,
+                    self.blocked,
+                    self.blocked_seconds,
+                )
+            )
+            self.max_depth = 0
+            self.blocked = 0
+            self.blocked_seconds = 0.0
+
+
+_queues: Dict[int, GuildQueue] = {}
+
+
+async def submit(guild_id: int, work: Work) -> Any:
+    """
+    Runs the work in order with the other work submitted for the same guild. Work
+    submitted while already running queued work of the guild is run directly, as
+    it would otherwise wait for itself.
+    """
+    if _running_guild.get() == guild_id:
+        return await work()
+    if guild_id not in _queues:
+        _queues[guild_id] = GuildQueue(guild_id)
+    return await _queues[guild_id].submit(work)
+
+
+def ordered_per_graph(func: Coroutine) -> Coroutine:
+    """
+    Wrapper to apply the modifications of a guild graph in order with the events of
+    the guild, for the parts of long running work like channel crawls that read and
+    patch the stored state, while the rest of the work does not hold up the events.
+    """
+
+    @wraps(func)
+    async def ordered_per_graph_wrapper(graph: RemoteGraph, *args, **kwargs) -> Any:
+        guild_id = await parse_snowflake(graph.identifier)
+        return await submit(guild_id, partial(func, graph, *args, **kwargs))
+
+    return ordered_per_graph_wrapper
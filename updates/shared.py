@@ -1,20 +1,33 @@
+from typing import Optional
+from logging import debug
+
 from rdflib.term import URIRef
 from rdflib.graph import Graph
 
-from discord.file import File
 from discord.role import Role
 from discord.member import Member
 from discord.scheduled_events import ScheduledEvent
 
 from graph.patch import patch
+from graph.patch import GraphPatch
 from graph.convert import cbd
+from graph.convert import fingerprint
+from graph.storage import RemoteGraph
 
 
-async def update_entity(graph: Graph, entity: Member | Role | ScheduledEvent) -> File:
+async def update_entity(
+    graph: RemoteGraph,
+    entity: Member | Role | ScheduledEvent,
+) -> Optional[GraphPatch]:
     """Updates the stored entity."""
 
-    after = cbd(entity)
-    before = graph.cbd(after.identifier)
+    after = cbd(entity).graph()
+
+    if await unchanged(graph, after):
+        debug(f"Skip unmodified <{after.identifier}>")
+        return None
+
+    before = await graph.cbd(after.identifier)
 
     file = await patch(graph, before, after)
 
@@ -24,11 +37,28 @@ async def update_entity(graph: Graph, entity: Member | Role | ScheduledEvent) ->
     return file
 
 
-async def delete_entity(graph: Graph, entity_uri: URIRef) -> File:
+async def unchanged(
+    graph: RemoteGraph,
+    after: Graph,
+    type: Optional[URIRef] = None,
+) -> bool:
+    """
+    Checks whether the stored descriptions match the collected ones, by comparing
+    the stored fingerprints of the described subjects, or of all the instances of
+    a class, without fetching the stored descriptions themselves.
+    """
+
+    subjects = set(after.subjects(unique=True))
+    stored = await graph.fingerprints(*subjects, type=type)
+
+    return stored == {subject: fingerprint(after, subject) for subject in subjects}
+
+
+async def delete_entity(graph: RemoteGraph, entity_uri: URIRef) -> Optional[GraphPatch]:
     """Deletes the stored entity."""
 
     after = Graph()
-    before = graph.cbd(entity_uri)
+    before = await graph.cbd(entity_uri)
 
     file = await patch(graph, before, after)
 
@@ -1,39 +1,35 @@
 from typing import Iterable
+from typing import Optional
+from logging import debug
 
 from rdflib.graph import Graph
-from rdflib.namespace import RDF
 
-from discord.file import File
 from discord.sticker import GuildSticker
 
 from graph.patch import patch
+from graph.patch import GraphPatch
 from graph.convert import cbd
+from graph.storage import RemoteGraph
 from graph.vocabulary import DISCORD
+from updates.shared import unchanged
 
 
-async def update_guild_stickers(graph: Graph, stickers: Iterable[GuildSticker]) -> File:
+async def update_guild_stickers(
+    graph: RemoteGraph,
+    stickers: Iterable[GuildSticker],
+) -> Optional[GraphPatch]:
     """Updates the stored guild stickers."""
 
-    before = Graph()
     after = Graph()
 
-    sticker_uris = set(
-        graph.subjects(
-            predicate=RDF.type,
-            object=DISCORD.GuildSticker,
-            unique=True,
-        )
-    )
-
     for sticker in stickers:
-        sticker_cbd = cbd(sticker)
-        after += sticker_cbd
-        before += graph.cbd(sticker_cbd.identifier)
-        if sticker_cbd.identifier in sticker_uris:
-            sticker_uris.remove(sticker_cbd.identifier)
-
-    for sticker_uri in sticker_uris:
-        before += graph.cbd(sticker_uri)
+        after += cbd(sticker)
+
+    if await unchanged(graph, after, DISCORD.GuildSticker):
+        debug(f"Skip unmodified stickers in <{graph.identifier}>")
+        return None
+
+    before = await graph.instances(DISCORD.GuildSticker)
 
     file = await patch(graph, before, after)
 
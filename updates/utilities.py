@@ -10,22 +10,31 @@ from discord.file import File
 from discord.guild import Guild
 from discord.errors import Forbidden
 
+from graph.patch import GraphPatch
 from graph.convert import uri
 
 
-async def send_notification(guild: Guild, file: Optional[File]) -> None:
-    """Sends a file to the public updates channel of the guild."""
+async def send_notification(
+    guild: Guild,
+    graph_patch: Optional[GraphPatch],
+) -> None:
+    """Sends the diff of a patch to the public updates channel of the guild."""
 
     guild_uri = uri(guild)
 
-    if not file:
+    if not graph_patch:
         debug(f"Attempting to send an empty patch to <{guild_uri}>")
     elif not guild.public_updates_channel:
         warning(f"Missing updates channel in <{guild_uri}>")
     else:
+        file = await graph_patch.file()
         try:
-            await guild.public_updates_channel.send(file=file)
-            debug(f"Sent file to updates channel in <{guild_uri}>")
+            if file:
+                await guild.public_updates_channel.send(file=file)
+                debug(f"Sent file to updates channel in <{guild_uri}>")
+            else:
+                await guild.public_updates_channel.send(f"`{graph_patch.summary()}`")
+                debug(f"Sent patch summary to updates channel in <{guild_uri}>")
         except Forbidden:
             warning(f"Missing permissions for updates channel in <{guild_uri}>")
         except Exception as ex: